@@ -1,6 +1,8 @@
+from collections.abc import Iterable
 from importlib.resources import files, as_file
-from typing import Literal
+from typing import Literal, NamedTuple
 
+import numpy as np
 import orjson
 from pydantic import BaseModel, ConfigDict
 from pydantic.alias_generators import to_camel
@@ -18,6 +20,7 @@ class Plant(BaseModel):
     model_config = ConfigDict(
         alias_generator=to_camel,
         validate_by_alias=True,
+        frozen=True,
     )
 
     name: str
@@ -37,6 +40,7 @@ class Mutation(BaseModel):
     model_config = ConfigDict(
         alias_generator=to_camel,
         validate_by_alias=True,
+        frozen=True,
     )
 
     name: str
@@ -59,9 +63,13 @@ class Mutation(BaseModel):
         "past",
         "color",
     ]
+    share_bit_index: int | None = None
+    """游戏分享链接中使用的位序号"""
 
 
 class PriceResult(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     base_factor: float
     """基础突变因数"""
     special_factor: float
@@ -78,19 +86,25 @@ def calc_price(plant: Plant, weight: float, mutations: list[Mutation]) -> PriceR
     根据给定的植物底价、重量、携带突变，
 
     计算其总价值与各项因数。
+    重量须在 [0, 最大重量] 内，同一突变不能重复携带。
     """
     if not isinstance(plant, Plant):
         raise TypeError("无效输入类型")
-    if weight > plant.max_weight:
+    # 写作 not weight >= 0 以同时排除 NaN
+    if not weight >= 0 or weight > plant.max_weight:
         raise Exception("无效的作物重量！")
 
     base_factor = 1
     special_factor = 1
     mutate_factor = 0
 
+    seen = set()
     for mutation in mutations:
         if not isinstance(mutation, Mutation):
             raise TypeError("无效输入类型")
+        if mutation.name in seen:
+            raise ValueError(f"重复的突变: {mutation.name}")
+        seen.add(mutation.name)
 
         if mutation.name in BASE_MUTATIONS:
             base_factor = max(base_factor, mutation.multiplier)
@@ -122,28 +136,182 @@ def calc_price(plant: Plant, weight: float, mutations: list[Mutation]) -> PriceR
     )
 
 
-def load_data() -> tuple[list[Plant], list[Mutation]]:
+class PriceArrays(NamedTuple):
+    """`PriceResult` 的批量形式，每个字段都是与输入等长的数组"""
+
+    base_factor: np.ndarray
+    special_factor: np.ndarray
+    weight_factor: np.ndarray
+    mutate_factor: np.ndarray
+    total_price: np.ndarray
+
+
+def encode_mutation_sets(
+    mutations: list[Mutation],
+    selections: Iterable[Iterable[str]],
+) -> np.ndarray:
+    """
+    将若干组突变名称编码为布尔矩阵，
+
+    第 i 行第 j 列表示第 i 组是否携带 `mutations[j]`。
+    与 `calc_price` 一致，同一组中重复的突变名称视为错误。
+    """
+    column = {mutation.name: i for i, mutation in enumerate(mutations)}
+    counts: list[int] = []
+    cols: list[int] = []
+    for names in selections:
+        count = len(cols)
+        cols += [column[name] for name in names]
+        counts.append(len(cols) - count)
+
+    # 一次性按 (行, 列) 下标赋值，避免逐行索引
+    encoded = np.zeros((len(counts), len(mutations)), dtype=np.bool_)
+    encoded[np.repeat(np.arange(len(counts)), counts), cols] = True
+    # 重复的名称落在同一格，该行的格数少于名称数
+    duplicated = np.flatnonzero(encoded.sum(axis=1) != counts)
+    if duplicated.size:
+        raise ValueError(f"第 {duplicated[0]} 组中有重复的突变")
+    return encoded
+
+
+_BATCH_CHUNK = 1 << 16
+
+
+def calc_price_batch(
+    plants: list[Plant],
+    mutations: list[Mutation],
+    plant_ids: np.ndarray,
+    weights: np.ndarray,
+    selected: np.ndarray,
+) -> PriceArrays:
+    """
+    `calc_price` 的批量版本。
+
+    `plant_ids` 为 `plants` 中的下标，`selected` 为 `encode_mutation_sets`
+    编码的突变矩阵，三者按行广播。结果与逐个调用 `calc_price` 完全一致。
+    """
+    plant_ids, weights = np.broadcast_arrays(
+        np.asarray(plant_ids, dtype=np.intp),
+        np.asarray(weights, dtype=np.float64),
+    )
+    plant_ids = plant_ids.ravel()
+    weights = weights.ravel()
+    count = plant_ids.shape[0]
+    selected = np.broadcast_to(
+        np.asarray(selected, dtype=np.bool_), (count, len(mutations))
+    )
+
+    max_weights = np.array([plant.max_weight for plant in plants], dtype=np.float64)
+    # 与 calc_price 一致，写作 ~(weights >= 0) 以同时排除 NaN
+    if np.any(~(weights >= 0) | (weights > max_weights[plant_ids])):
+        raise Exception("无效的作物重量！")
+
+    # 与 calc_price 一致：价格系数先保留四位小数
+    coefficients = np.array(
+        [round(plant.price_coefficient, 4) for plant in plants], dtype=np.float64
+    )
+    multipliers = np.array([m.multiplier for m in mutations], dtype=np.float64)
+    is_base = np.array([m.name in BASE_MUTATIONS for m in mutations])
+    is_special = np.zeros((len(plants), len(mutations)), dtype=np.bool_)
+    for i, plant in enumerate(plants):
+        if plant.special_mutations is not None:
+            is_special[i] = [
+                m.name in plant.special_mutations and not is_base[j]
+                for j, m in enumerate(mutations)
+            ]
+
+    base_factor = np.empty(count, dtype=np.float64)
+    special_factor = np.empty(count, dtype=np.float64)
+    mutate_factor = np.empty(count, dtype=np.float64)
+    for start in range(0, count, _BATCH_CHUNK):
+        rows = slice(start, start + _BATCH_CHUNK)
+        chunk = selected[rows]
+        special = is_special[plant_ids[rows]]
+
+        base_factor[rows] = np.where(chunk & is_base, multipliers, 1.0).max(
+            axis=1, initial=1.0
+        )
+        special_factor[rows] = np.where(chunk & special, multipliers, 1.0).max(
+            axis=1, initial=1.0
+        )
+        mutate_factor[rows] = np.where(
+            chunk & ~is_base & ~special, multipliers, 0.0
+        ).sum(axis=1)
+
+    # numpy 的 SIMD 幂运算与 Python 的 `**` 可能相差 1 ulp，
+    # 对去重后的重量逐个使用 `**` 以保证结果一致
+    unique_weights, inverse = np.unique(weights, return_inverse=True)
+    weight_factor = np.fromiter(
+        (weight**1.5 for weight in unique_weights.tolist()),
+        dtype=np.float64,
+        count=unique_weights.shape[0],
+    )[inverse]
+
+    total_price = (
+        coefficients[plant_ids]
+        * weight_factor
+        * base_factor
+        * special_factor
+        * (1 + mutate_factor)
+    )
+
+    return PriceArrays(
+        base_factor=base_factor,
+        special_factor=special_factor,
+        weight_factor=weight_factor,
+        mutate_factor=mutate_factor,
+        total_price=total_price,
+    )
+
+
+def read_data() -> tuple[bytes, bytes]:
+    """plants.json 与 mutations.json 的原始内容"""
     base_dir = files("fknc_calc")
     with (
         as_file(base_dir / "plants.json") as plants_file,
         as_file(base_dir / "mutations.json") as mutations_file,
     ):
         with open(plants_file, "rb") as f:
-            data = f.read()
-            raw_list: list = orjson.loads(data)
-            plants = list(map(Plant.model_validate, raw_list))
-
+            plants_data = f.read()
         with open(mutations_file, "rb") as f:
-            data = f.read()
-            raw_list: list = orjson.loads(data)
-            mutations = list(map(Mutation.model_validate, raw_list))
-            mutations.sort(
-                key=lambda m: (
-                    m.group_key != "past",
-                    m.multiplier,
-                ),
-                reverse=True,
-            )
+            mutations_data = f.read()
+    return plants_data, mutations_data
+
+
+def load_data(use_snapshot: bool = False) -> tuple[list[Plant], list[Mutation]]:
+    return decode_data(*read_data(), use_snapshot=use_snapshot)
+
+
+def decode_data(
+    plants_data: bytes, mutations_data: bytes, use_snapshot: bool = False
+) -> tuple[list[Plant], list[Mutation]]:
+    # 快照的记录仍需逐条校验，实测并不比 JSON 快，默认不使用；
+    # 启用时快照缺失、损坏或与数据文件不一致都会回退到 JSON
+    if use_snapshot:
+        from fknc_calc.snapshot import load_snapshot
+
+        snapshot = load_snapshot(plants_data, mutations_data)
+        if snapshot is not None:
+            return snapshot
+
+    return parse_data(plants_data, mutations_data)
+
+
+def parse_data(
+    plants_data: bytes, mutations_data: bytes
+) -> tuple[list[Plant], list[Mutation]]:
+    raw_list: list = orjson.loads(plants_data)
+    plants = list(map(Plant.model_validate, raw_list))
+
+    raw_list = orjson.loads(mutations_data)
+    mutations = list(map(Mutation.model_validate, raw_list))
+    mutations.sort(
+        key=lambda m: (
+            m.group_key != "past",
+            m.multiplier,
+        ),
+        reverse=True,
+    )
 
     return plants, mutations
 
@@ -0,0 +1,127 @@
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from fknc_calc import Plant, PriceResult, calc_price
+from fknc_calc.catalog import Catalog
+
+__all__ = ["PRICE_CACHE", "CacheStats", "PriceCache", "weight_key"]
+
+WEIGHT_SCALE = 1000
+"""每 kg 的量化步数，即精确到 0.001 kg，与 UI 输入的精度一致"""
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    """因容量已满被淘汰的条目数"""
+    invalidations: int
+    """因数据变化而整体清空的次数"""
+    size: int
+
+
+def weight_key(weight: float) -> int:
+    """将重量量化为 1/WEIGHT_SCALE kg 的整数倍"""
+    return round(weight * WEIGHT_SCALE)
+
+
+class PriceCache:
+    """
+    计价结果的 LRU 缓存，
+
+    以 (作物下标, 量化后的重量, 突变掩码) 为键，同一组合只计算一次。
+    缓存绑定到目录的内容哈希，即 data_version.json 中发布的哈希，
+    数据变化时自动清空。可在多个线程间共享。
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[int, int, int], PriceResult] = OrderedDict()
+        self._content_hash: bytes | None = None
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._invalidations = 0
+
+    def price(
+        self,
+        catalog: Catalog,
+        plant: Plant,
+        weight: float,
+        mutations: Iterable[str],
+    ) -> PriceResult:
+        """
+        与 `calc_price` 相同，总是按给定的精确重量计算。
+
+        只有恰好落在 1/WEIGHT_SCALE kg 网格上的重量（UI 的输入均是如此）才会缓存，
+        其余重量直接计算，不会被取整。突变以名称给出，顺序不影响结果。
+        """
+        mutations = list(mutations)
+        if not math.isfinite(weight) or weight_key(weight) / WEIGHT_SCALE != weight:
+            with self._lock:
+                self._misses += 1
+            return calc_price(
+                plant, weight, [catalog.mutation(name) for name in mutations]
+            )
+        # 超重等无效输入在未命中时由 calc_price 报错，不会进入缓存
+        mask = catalog.registry.encode(mutations)
+        if mask.bit_count() != len(mutations):
+            # 掩码会合并重复的名称，与 calc_price 一样报错，而不是返回去重后的缓存结果
+            raise ValueError(f"重复的突变: {'、'.join(mutations)}")
+        key = (catalog.plant_index[plant.name], weight_key(weight), mask)
+
+        with self._lock:
+            self._bind(catalog)
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return result
+            self._misses += 1
+
+        # 计算在锁外进行，并发的相同请求可能各算一次，结果相同；
+        # 突变按位序号排列，缓存的结果与填入时的顺序无关
+        result = calc_price(
+            plant,
+            weight,
+            [catalog.mutation(name) for name in catalog.registry.decode(mask)],
+        )
+
+        with self._lock:
+            if self._content_hash == catalog.content_hash:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return result
+
+    def _bind(self, catalog: Catalog):
+        if self._content_hash == catalog.content_hash:
+            return
+        if self._content_hash is not None:
+            self._entries.clear()
+            self._invalidations += 1
+        self._content_hash = catalog.content_hash
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                invalidations=self._invalidations,
+                size=len(self._entries),
+            )
+
+    def clear(self):
+        """清空缓存与计数"""
+        with self._lock:
+            self._entries.clear()
+            self._content_hash = None
+            self._hits = self._misses = self._evictions = self._invalidations = 0
+
+
+PRICE_CACHE = PriceCache()
+"""进程内共享的计价缓存"""
@@ -0,0 +1,133 @@
+from collections import defaultdict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import get_args
+
+import orjson
+
+from fknc_calc import BASE_MUTATIONS, Mutation, Plant, decode_data, read_data
+from fknc_calc.registry import MutationRegistry
+from fknc_calc.rules import RULES
+from fknc_calc.snapshot import content_hash
+
+__all__ = ["Catalog"]
+
+QUALITIES: tuple[str, ...] = get_args(Plant.model_fields["quality"].annotation)
+
+
+class Catalog:
+    """
+    作物与突变数据的索引，
+
+    一次性构建常用的查找表与排序结果，避免每次交互时重复计算。
+    构建后只读，可在多个会话间共享。
+    """
+
+    def __init__(
+        self,
+        plants: list[Plant],
+        mutations: list[Mutation],
+        data_hash: bytes | None = None,
+    ):
+        """
+        Args:
+            plants: 作物
+            mutations: 突变
+            data_hash: 源数据文件的内容哈希，默认按模型内容计算
+        """
+        self.plants: tuple[Plant, ...] = tuple(plants)
+        self.mutations: tuple[Mutation, ...] = tuple(mutations)
+        """按 UI 展示顺序排列"""
+
+        self.plant_index: Mapping[str, int] = MappingProxyType(
+            {plant.name: i for i, plant in enumerate(self.plants)}
+        )
+        self.plants_by_name: Mapping[str, Plant] = MappingProxyType(
+            {plant.name: plant for plant in self.plants}
+        )
+        self.mutations_by_name: Mapping[str, Mutation] = MappingProxyType(
+            {mutation.name: mutation for mutation in self.mutations}
+        )
+
+        # 各品质下的作物，按拼音排序
+        # pypinyin 导入较慢，仅在构建索引时加载
+        from pypinyin import lazy_pinyin
+
+        by_quality: dict[str, list[Plant]] = {quality: [] for quality in QUALITIES}
+        for plant in sorted(self.plants, key=lambda p: lazy_pinyin(p.name)):
+            by_quality[plant.quality].append(plant)
+        self.plants_by_quality: Mapping[str, tuple[Plant, ...]] = MappingProxyType(
+            {quality: tuple(plants) for quality, plants in by_quality.items()}
+        )
+        self.plant_names_by_quality: Mapping[str, tuple[str, ...]] = MappingProxyType(
+            {
+                quality: tuple(plant.name for plant in plants)
+                for quality, plants in by_quality.items()
+            }
+        )
+
+        self.special_mutations: frozenset[str] = frozenset(
+            name
+            for plant in self.plants
+            if plant.special_mutations
+            for name in plant.special_mutations
+        )
+        """所有作物的独占突变"""
+
+        by_group: dict[str, list[Mutation]] = defaultdict(list)
+        for mutation in self.mutations:
+            by_group[mutation.group_key].append(mutation)
+        self.mutations_by_group: Mapping[str, tuple[Mutation, ...]] = MappingProxyType(
+            {group: tuple(mutations) for group, mutations in by_group.items()}
+        )
+
+        # 常规突变：既非基础突变，也非任何作物的独占突变
+        regular = [
+            mutation.name
+            for mutation in self.mutations
+            if mutation.name not in BASE_MUTATIONS
+            and mutation.name not in self.special_mutations
+        ]
+        # 配方产物按配方的拓扑序排列，产物总在其原料之前
+        self.recipe_mutations: tuple[str, ...] = tuple(
+            name for name in RULES.order if name in regular
+        )
+        self.other_mutations: tuple[str, ...] = tuple(
+            name for name in regular if name not in self.recipe_mutations
+        )
+        """除配方产物以外的常规突变，按 UI 展示顺序排列"""
+
+        self.registry = MutationRegistry(self.mutations)
+
+        if data_hash is None:
+            # 不是从数据文件加载时，没有发布的哈希可用，按规范化的模型内容计算
+            data_hash = content_hash(
+                *(
+                    orjson.dumps([m.model_dump(by_alias=True) for m in models])
+                    for models in (self.plants, self.mutations)
+                )
+            )
+        self.content_hash: bytes = data_hash
+        """
+        作物与突变数据的内容哈希，数据变化时随之改变。
+
+        由 `load` 加载时即 data_version.json 中发布的哈希。
+        """
+
+    @classmethod
+    def load(cls) -> "Catalog":
+        return cls.from_data(*read_data())
+
+    @classmethod
+    def from_data(cls, plants_data: bytes, mutations_data: bytes) -> "Catalog":
+        """由 plants.json 与 mutations.json 的原始内容构建"""
+        return cls(
+            *decode_data(plants_data, mutations_data),
+            data_hash=content_hash(plants_data, mutations_data),
+        )
+
+    def plant(self, name: str) -> Plant:
+        return self.plants_by_name[name]
+
+    def mutation(self, name: str) -> Mutation:
+        return self.mutations_by_name[name]
@@ -0,0 +1,256 @@
+import argparse
+import csv
+import io
+import sys
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import cache
+from itertools import islice
+from pathlib import Path
+from typing import IO, Literal
+
+import numpy as np
+import orjson
+
+from fknc_calc import PriceResult, calc_price_batch, encode_mutation_sets
+from fknc_calc.catalog import Catalog
+
+__all__ = ["main", "price_chunk"]
+
+Format = Literal["jsonl", "csv"]
+
+PRICE_FIELDS = tuple(PriceResult.model_fields)
+"""输出中追加的价格字段"""
+
+MUTATION_SEPARATOR = ";"
+"""CSV 中突变名称的分隔符"""
+
+# 每行：(行号, 记录)。JSONL 的记录为原始文本，CSV 的记录为各列的值，
+# 都交给子进程解析，减少进程间传递的数据量
+Row = tuple[int, str | list[str]]
+
+
+@cache
+def _catalog() -> Catalog:
+    # 每个进程只加载一次
+    return Catalog.load()
+
+
+def _parse(
+    record: str | list[str], header: list[str] | None
+) -> tuple[dict, str, float, list[str]]:
+    """解析一行记录，返回 (原始字段, 作物, 重量, 突变)"""
+    if isinstance(record, str):
+        fields = orjson.loads(record)
+        if not isinstance(fields, dict):
+            raise ValueError("每行须为 JSON 对象")
+        mutations = fields.get("mutations") or []
+        if not isinstance(mutations, list):
+            raise ValueError("mutations 须为列表")
+    else:
+        fields = dict(zip(header or (), record))
+        text = fields.get("mutations") or ""
+        mutations = [
+            name.strip() for name in text.split(MUTATION_SEPARATOR) if name.strip()
+        ]
+    plant = fields.get("plant")
+    if not isinstance(plant, str):
+        raise ValueError("缺少 plant")
+    weight = fields.get("weight")
+    if weight is None or isinstance(weight, bool):
+        raise ValueError("缺少 weight")
+    return fields, plant, float(weight), mutations
+
+
+def price_chunk(
+    rows: list[Row], header: list[str] | None = None
+) -> tuple[list[dict], list[dict]]:
+    """
+    计算一块记录的价格，返回 (带价格的记录, 错误记录)。
+
+    整块校验后一次性批量计算，无效行不影响其他行。
+    CSV 记录需同时给出表头 `header`。
+    """
+    catalog = _catalog()
+    valid: list[tuple[dict, int, float, list[str]]] = []
+    errors: list[dict] = []
+    for line, record in rows:
+        try:
+            fields, plant_name, weight, mutations = _parse(record, header)
+            plant_id = catalog.plant_index.get(plant_name)
+            if plant_id is None:
+                raise ValueError(f"未知的作物: {plant_name}")
+            unknown = [
+                name for name in mutations if name not in catalog.mutations_by_name
+            ]
+            if unknown:
+                raise ValueError(f"未知的突变: {'、'.join(unknown)}")
+            # 与 calc_price 的校验一致：重复的突变与 [0, 最大重量] 之外的重量均无效
+            repeated = sorted({name for name in mutations if mutations.count(name) > 1})
+            if repeated:
+                raise ValueError(f"重复的突变: {'、'.join(repeated)}")
+            if not weight >= 0 or weight > catalog.plants[plant_id].max_weight:
+                raise ValueError("无效的作物重量！")
+        except (ValueError, TypeError) as e:
+            errors.append({"line": line, "record": record, "error": str(e)})
+            continue
+        valid.append((fields, plant_id, weight, mutations))
+
+    if not valid:
+        return [], errors
+
+    mutations = list(catalog.mutations)
+    prices = calc_price_batch(
+        list(catalog.plants),
+        mutations,
+        np.array([plant_id for _, plant_id, _, _ in valid]),
+        np.array([weight for _, _, weight, _ in valid]),
+        encode_mutation_sets(mutations, (names for *_, names in valid)),
+    )
+    columns = [getattr(prices, field).tolist() for field in PRICE_FIELDS]
+    results = [
+        fields | dict(zip(PRICE_FIELDS, values))
+        for (fields, *_), values in zip(valid, zip(*columns))
+    ]
+    return results, errors
+
+
+def read_rows(
+    stream: IO[str], format: Format
+) -> tuple[list[str] | None, Iterator[Row]]:
+    """返回 (CSV 表头, 逐行记录)"""
+    if format == "jsonl":
+        rows = (
+            (line, text) for line, text in enumerate(stream, start=1) if text.strip()
+        )
+        return None, rows
+
+    reader = csv.reader(stream)
+    header = next(reader, [])
+    rows = ((reader.line_num, record) for record in reader if record)
+    return header, rows
+
+
+def chunked(rows: Iterable[Row], size: int) -> Iterator[list[Row]]:
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _encode_chunk(
+    rows: list[Row], header: list[str] | None
+) -> tuple[str, str, int, int]:
+    """
+    计算一块记录并编码为输出文本。
+
+    返回 (输出, 错误输出, 总行数, 无效行数)，在子进程中执行时只需传回文本。
+    """
+    results, errors = price_chunk(rows, header)
+    if header is None:
+        output = "".join(orjson.dumps(record).decode() + "\n" for record in results)
+    else:
+        buffer = io.StringIO()
+        csv.DictWriter(
+            buffer,
+            fieldnames=header + list(PRICE_FIELDS),
+            extrasaction="ignore",
+            lineterminator="\n",
+        ).writerows(results)
+        output = buffer.getvalue()
+    error_output = "".join(orjson.dumps(error).decode() + "\n" for error in errors)
+    return output, error_output, len(results) + len(errors), len(errors)
+
+
+def price_chunks(
+    chunks: Iterable[list[Row]], header: list[str] | None, workers: int
+) -> Iterator[tuple[str, str, int, int]]:
+    """
+    按输入顺序产出各块的输出文本。
+
+    多进程时最多同时提交 2×workers 块，内存占用与输入规模无关。
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield _encode_chunk(chunk, header)
+        return
+
+    with ProcessPoolExecutor(workers) as executor:
+        pending: deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_encode_chunk, chunk, header))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _detect_format(path: str, format: Format | None) -> Format:
+    if format is not None:
+        return format
+    return "csv" if Path(path).suffix.lower() == ".csv" else "jsonl"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="fknc-price",
+        description="批量计算作物价格：读取 (plant, weight, mutations) 记录，"
+        "输出附带 PriceResult 各项因数的记录",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="输入文件，默认标准输入")
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["jsonl", "csv"],
+        help="输入格式，默认按扩展名判断，标准输入默认为 jsonl；"
+        f"CSV 的 mutations 列以 {MUTATION_SEPARATOR} 分隔",
+    )
+    parser.add_argument("-o", "--output", default="-", help="输出文件，默认标准输出")
+    parser.add_argument(
+        "-e", "--errors", default=None, help="无效记录的输出文件（JSONL），默认标准错误"
+    )
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="每块的行数")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="进程数")
+    args = parser.parse_args(argv)
+
+    format = _detect_format(args.input, args.format)
+    source = (
+        sys.stdin
+        if args.input == "-"
+        else open(args.input, encoding="utf-8", newline="")
+    )
+    target = (
+        sys.stdout
+        if args.output == "-"
+        else open(args.output, "w", encoding="utf-8", newline="")
+    )
+    error_target = (
+        sys.stderr if args.errors is None else open(args.errors, "w", encoding="utf-8")
+    )
+
+    total = failed = 0
+    try:
+        header, rows = read_rows(source, format)
+        if header is not None:
+            csv.writer(target, lineterminator="\n").writerow(
+                header + list(PRICE_FIELDS)
+            )
+        chunks = chunked(rows, args.chunk_size)
+        for output, error_output, count, invalid in price_chunks(
+            chunks, header, args.workers
+        ):
+            target.write(output)
+            error_target.write(error_output)
+            total += count
+            failed += invalid
+    finally:
+        for stream in (source, target, error_target):
+            if stream not in (sys.stdin, sys.stdout, sys.stderr):
+                stream.close()
+
+    print(f"已处理 {total} 行，其中无效 {failed} 行", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
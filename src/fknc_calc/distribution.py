@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import NamedTuple, Protocol
+
+import numpy as np
+
+from fknc_calc import Mutation, Plant, calc_price
+
+__all__ = [
+    "NormalWeight",
+    "PriceDistribution",
+    "UniformWeight",
+    "WeightDistribution",
+    "price_distribution",
+]
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+_MAX_REJECTION_ROUNDS = 100
+
+
+class WeightDistribution(Protocol):
+    """作物重量的分布，以最大重量的比例表示，须可哈希以便缓存"""
+
+    def sample(
+        self, rng: np.random.Generator, size: int, max_weight: float
+    ) -> np.ndarray: ...
+
+
+@dataclass(frozen=True)
+class UniformWeight:
+    """重量在 [low, high] × 最大重量 上均匀分布，默认与 UI 的重量范围一致"""
+
+    low: float = 1 / 34
+    high: float = 1.0
+
+    @classmethod
+    def sprinkler(cls, k: float, g: float = 1.0) -> "UniformWeight":
+        """洒水器模型：重量 = 最大重量·k·G·x/34，x ~ U(1,2)"""
+        return cls(low=k * g / 34, high=2 * k * g / 34)
+
+    def bounds(self, max_weight: float) -> tuple[float, float]:
+        return self.low * max_weight, self.high * max_weight
+
+    def sample(
+        self, rng: np.random.Generator, size: int, max_weight: float
+    ) -> np.ndarray:
+        low, high = self.bounds(max_weight)
+        return rng.uniform(low, high, size)
+
+
+@dataclass(frozen=True)
+class NormalWeight:
+    """截断在 [low, high] × 最大重量 内的正态分布"""
+
+    mean: float
+    std: float
+    low: float = 1 / 34
+    high: float = 1.0
+
+    def sample(
+        self, rng: np.random.Generator, size: int, max_weight: float
+    ) -> np.ndarray:
+        # 拒绝抽样，每轮抽取 2·size 个；区间落在远尾时接受率过低，报错而不是一直重试
+        parts = []
+        count = 0
+        for _ in range(_MAX_REJECTION_ROUNDS):
+            draw = rng.normal(self.mean, self.std, 2 * size)
+            draw = draw[(draw >= self.low) & (draw <= self.high)]
+            parts.append(draw)
+            count += draw.shape[0]
+            if count >= size:
+                break
+        if count < size:
+            raise ValueError("截断区间内的概率过低，无法抽样")
+        return np.concatenate(parts)[:size] * max_weight
+
+
+class PriceDistribution(NamedTuple):
+    quantile_levels: tuple[float, ...]
+    quantiles: np.ndarray
+    """各分位点对应的总价格"""
+    mean: float
+    """总价格的期望"""
+    bin_edges: np.ndarray
+    """直方图区间边界（总价格）"""
+    probabilities: np.ndarray
+    """落在各区间内的概率"""
+    exact: bool
+    """是否为解析解"""
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+class _WeightFactorStats(NamedTuple):
+    quantiles: np.ndarray
+    mean: float
+    bin_edges: np.ndarray
+    probabilities: np.ndarray
+    exact: bool
+
+
+@lru_cache(maxsize=256)
+def _weight_factor_stats(
+    max_weight: float,
+    distribution: WeightDistribution,
+    quantile_levels: tuple[float, ...],
+    bins: int,
+    samples: int,
+    seed: int,
+) -> _WeightFactorStats:
+    """
+    重量因数 weight**1.5 的分布统计。
+
+    与突变无关，突变变化时只需对结果整体缩放。
+    结果被缓存共享，其中的数组均为只读。
+    """
+    levels = np.asarray(quantile_levels)
+
+    if isinstance(distribution, UniformWeight):
+        # w ~ U(a, b)，y = w^1.5 单调，可直接求解
+        a, b = distribution.bounds(max_weight)
+        quantiles = (a + levels * (b - a)) ** 1.5
+        if b == a:
+            mean = a**1.5
+            edges = np.full(bins + 1, a**1.5)
+            probabilities = np.full(bins, 1 / bins)
+        else:
+            mean = (b**2.5 - a**2.5) / (2.5 * (b - a))
+            edges = np.linspace(a**1.5, b**1.5, bins + 1)
+            probabilities = np.diff(edges ** (2 / 3)) / (b - a)
+        return _WeightFactorStats(
+            _read_only(quantiles),
+            mean,
+            _read_only(edges),
+            _read_only(probabilities),
+            True,
+        )
+
+    rng = np.random.default_rng(seed)
+    values = distribution.sample(rng, samples, max_weight) ** 1.5
+    counts, edges = np.histogram(values, bins=bins)
+    return _WeightFactorStats(
+        _read_only(np.quantile(values, levels)),
+        float(values.mean()),
+        _read_only(edges),
+        _read_only(counts / values.shape[0]),
+        False,
+    )
+
+
+def price_distribution(
+    plant: Plant,
+    mutations: list[Mutation],
+    distribution: WeightDistribution = UniformWeight(),
+    quantile_levels: tuple[float, ...] = DEFAULT_QUANTILES,
+    bins: int = 20,
+    samples: int = 200_000,
+    seed: int = 0,
+) -> PriceDistribution:
+    """
+    作物重量随机时总价格的分布。
+
+    均匀分布使用解析解，其余分布使用向量化抽样。
+    重量因数的统计按 (作物, 分布) 缓存，更换突变只需重新缩放。
+    """
+    stats = _weight_factor_stats(
+        plant.max_weight, distribution, tuple(quantile_levels), bins, samples, seed
+    )
+
+    # 总价格 = 价格系数 × 重量因数 × 各项突变因数，后两者与重量无关
+    result = calc_price(plant, plant.max_weight, mutations)
+    scale = (
+        round(plant.price_coefficient, 4)
+        * result.base_factor
+        * result.special_factor
+        * (1 + result.mutate_factor)
+    )
+
+    return PriceDistribution(
+        quantile_levels=tuple(quantile_levels),
+        quantiles=stats.quantiles * scale,
+        mean=stats.mean * scale,
+        bin_edges=stats.bin_edges * scale,
+        probabilities=stats.probabilities,
+        exact=stats.exact,
+    )
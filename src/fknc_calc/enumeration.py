@@ -0,0 +1,211 @@
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import NamedTuple
+
+import numpy as np
+
+from fknc_calc.registry import MutationRegistry
+from fknc_calc.rules import RULES, RuleEngine
+
+__all__ = ["MutationSetEnumerator", "Shard"]
+
+
+class Shard(NamedTuple):
+    """
+    按前缀划分的一段枚举范围：
+
+    全集中最高的 depth 个位固定为 prefix 中的取值，其余位自由枚举。
+    """
+
+    depth: int
+    prefix: int
+
+
+def _subsets(mask: int) -> Iterator[int]:
+    """按升序产出 mask 的所有子集"""
+    subset = 0
+    while True:
+        yield subset
+        subset = (subset - mask) & mask
+        if not subset:
+            return
+
+
+def _bits_of(mask: int) -> list[int]:
+    """掩码中各位的序号，从高到低"""
+    bits = []
+    while mask:
+        bit = mask.bit_length() - 1
+        bits.append(bit)
+        mask ^= 1 << bit
+    return bits
+
+
+class MutationSetEnumerator:
+    """
+    按规则枚举所有合法的突变组合，
+
+    合法组合即互斥图上的独立集：任一配方产物与其（间接）原料不能同时选择。
+    组合以 `MutationRegistry` 掩码表示，按掩码数值升序惰性产出。
+    """
+
+    def __init__(
+        self,
+        registry: MutationRegistry,
+        groups: Iterable[str] | None = None,
+        names: Iterable[str] | None = None,
+        rules: RuleEngine = RULES,
+    ):
+        """
+        Args:
+            registry: 突变注册表
+            groups: 仅包含这些分组的突变，为 None 时不限制
+            names: 仅包含这些突变，为 None 时不限制
+            rules: 互斥规则
+        """
+        self.registry = registry
+        groups = None if groups is None else set(groups)
+        names = None if names is None else set(names)
+        self.universe: int = registry.encode(
+            m.name
+            for m in registry.mutations
+            if (groups is None or m.group_key in groups)
+            and (names is None or m.name in names)
+        )
+        """参与枚举的突变"""
+
+        # 互斥关系是对称的：产物排斥原料，原料也排斥产物
+        conflicts: dict[int, int] = dict.fromkeys(_bits_of(self.universe), 0)
+        for bit in conflicts:
+            disabled = rules.disabled_mask(registry, 1 << bit) & self.universe
+            conflicts[bit] |= disabled
+            for other in _bits_of(disabled):
+                conflicts[other] |= 1 << bit
+        self._conflicts = conflicts
+        self._order: tuple[int, ...] = tuple(conflicts)
+        """全集中的位序号，从高到低"""
+
+        self.constrained: int = 0
+        """存在互斥关系的突变"""
+        for bit, mask in conflicts.items():
+            if mask:
+                self.constrained |= 1 << bit
+        self._count_cache: dict[int, int] = {}
+
+    def _below(self, depth: int) -> int:
+        """全集中除最高 depth 位以外的部分"""
+        if depth >= len(self._order):
+            return 0
+        return self.universe & ((1 << (self._order[depth] + 1)) - 1)
+
+    def _check_shard(self, shard: Shard) -> int:
+        """校验前缀，返回前缀所排斥的位"""
+        depth, prefix = shard
+        if not 0 <= depth <= len(self._order):
+            raise ValueError("无效的分片深度")
+        if prefix & ~(self.universe & ~self._below(depth)):
+            raise ValueError("分片前缀超出范围")
+        blocked = 0
+        for bit in _bits_of(prefix):
+            blocked |= self._conflicts[bit]
+        return blocked
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iter(Shard(0, 0))
+
+    def iter(self, shard: Shard = Shard(0, 0)) -> Iterator[int]:
+        """
+        按掩码升序产出分片内的所有合法组合。
+
+        从高位到低位深度优先搜索，先走不选的分支即为升序；
+        最低的互斥位以下全是自由位，直接按升序枚举其子集。
+        """
+        blocked = self._check_shard(shard)
+        if shard.prefix & blocked:
+            return
+        order = self._order
+        conflicts = self._conflicts
+
+        # 搜索到 stop 位置后，剩余位都是自由位
+        lowest = self.constrained & self._below(shard.depth)
+        free_tail = self._below(shard.depth) & ((lowest & -lowest) - 1)
+        stop = len(order) - free_tail.bit_count()
+
+        stack = [(shard.depth, shard.prefix, blocked)]
+        while stack:
+            index, mask, blocked = stack.pop()
+            if index == stop:
+                for tail in _subsets(free_tail):
+                    yield mask | tail
+                continue
+
+            bit = order[index]
+            if not blocked >> bit & 1:
+                stack.append((index + 1, mask | 1 << bit, blocked | conflicts[bit]))
+            stack.append((index + 1, mask, blocked))
+
+    def iter_batches(
+        self, shard: Shard = Shard(0, 0), size: int = 1 << 16
+    ) -> Iterator[np.ndarray]:
+        """
+        以 uint64 数组分批产出合法组合，
+
+        可配合 `MutationRegistry.unpack` 与 `calc_price_batch` 批量计算。
+        """
+        masks = self.iter(shard)
+        while True:
+            batch = np.fromiter(islice(masks, size), dtype=np.uint64)
+            if not batch.size:
+                return
+            yield batch
+
+    def shards(self, depth: int) -> list[Shard]:
+        """
+        按最高 depth 位划分枚举范围，只返回前缀本身合法的分片，
+
+        依次遍历各分片的结果与完整遍历相同，可分发到多个进程并行处理。
+        """
+        depth = min(depth, len(self._order))
+        head = self.universe & ~self._below(depth)
+        return [
+            Shard(depth, prefix)
+            for prefix in _subsets(head)
+            if not prefix & self._check_shard(Shard(depth, prefix))
+        ]
+
+    def _count_independent(self, nodes: int) -> int:
+        """互斥图在 nodes 上的独立集数目"""
+        if not nodes:
+            return 1
+        cached = self._count_cache.get(nodes)
+        if cached is not None:
+            return cached
+
+        # 选度数最大的点分支：不选它，或选它并去掉它的邻点
+        best, degree = -1, 0
+        for bit in _bits_of(nodes):
+            d = (self._conflicts[bit] & nodes).bit_count()
+            if d > degree:
+                best, degree = bit, d
+        if best < 0:
+            result = 1 << nodes.bit_count()
+        else:
+            rest = nodes & ~(1 << best)
+            result = self._count_independent(rest) + self._count_independent(
+                rest & ~self._conflicts[best]
+            )
+        self._count_cache[nodes] = result
+        return result
+
+    def count(self, shard: Shard = Shard(0, 0)) -> int:
+        """
+        不列举组合，直接求分片内合法组合的数目。
+
+        自由位各贡献 2 倍，其余部分对互斥图的独立集计数。
+        """
+        blocked = self._check_shard(shard)
+        if shard.prefix & blocked:
+            return 0
+        rest = self._below(shard.depth) & ~blocked
+        free = rest & ~self.constrained
+        return self._count_independent(rest & self.constrained) << free.bit_count()
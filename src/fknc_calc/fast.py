@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+
+from fknc_calc import (
+    BASE_MUTATIONS,
+    Mutation,
+    Plant,
+    PriceResult,
+)
+
+__all__ = [
+    "FastPlant",
+    "FastMutation",
+    "calc_price_fast",
+    "to_fast_plant",
+    "to_fast_mutation",
+    "to_plant",
+    "to_mutation",
+    "to_price_result",
+]
+
+_BASE_MUTATIONS = frozenset(BASE_MUTATIONS)
+
+
+@dataclass(frozen=True, slots=True)
+class FastPlant:
+    name: str
+    image_url: str
+    price_coefficient: float
+    max_weight: float
+    growth_speed: float
+    seed_price: int | None
+    quality: str
+    special_mutations: tuple[str, ...] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class FastMutation:
+    name: str
+    color: str
+    multiplier: float
+    group_key: str
+    share_bit_index: int | None = None
+
+
+def calc_price_fast(
+    plant: FastPlant,
+    weight: float,
+    mutations: list[FastMutation],
+) -> tuple[float, float, float, float, float]:
+    """
+    `calc_price` 的快速版本，不做类型检查。
+
+    返回 (base_factor, special_factor, weight_factor, mutate_factor, total_price)，
+    顺序与 `PriceResult` 的字段一致。
+    """
+    if weight > plant.max_weight:
+        raise Exception("无效的作物重量！")
+
+    base_factor = 1
+    special_factor = 1
+    mutate_factor = 0
+    specials = plant.special_mutations or ()
+
+    for mutation in mutations:
+        if mutation.name in _BASE_MUTATIONS:
+            if mutation.multiplier > base_factor:
+                base_factor = mutation.multiplier
+        elif mutation.name in specials:
+            if mutation.multiplier > special_factor:
+                special_factor = mutation.multiplier
+        else:
+            mutate_factor += mutation.multiplier
+
+    weight_factor = weight**1.5
+    total_price = (
+        round(plant.price_coefficient, 4)
+        * weight_factor
+        * base_factor
+        * special_factor
+        * (1 + mutate_factor)
+    )
+
+    return base_factor, special_factor, weight_factor, mutate_factor, total_price
+
+
+def to_fast_plant(plant: Plant) -> FastPlant:
+    return FastPlant(
+        name=plant.name,
+        image_url=plant.image_url,
+        price_coefficient=plant.price_coefficient,
+        max_weight=plant.max_weight,
+        growth_speed=plant.growth_speed,
+        seed_price=plant.seed_price,
+        quality=plant.quality,
+        special_mutations=plant.special_mutations,
+    )
+
+
+def to_fast_mutation(mutation: Mutation) -> FastMutation:
+    return FastMutation(
+        name=mutation.name,
+        color=mutation.color,
+        multiplier=mutation.multiplier,
+        group_key=mutation.group_key,
+        share_bit_index=mutation.share_bit_index,
+    )
+
+
+def to_plant(plant: FastPlant) -> Plant:
+    """转换回 pydantic 模型，会重新校验数据"""
+    return Plant.model_validate(
+        {
+            "name": plant.name,
+            "image_url": plant.image_url,
+            "price_coefficient": plant.price_coefficient,
+            "max_weight": plant.max_weight,
+            "growth_speed": plant.growth_speed,
+            "seed_price": plant.seed_price,
+            "quality": plant.quality,
+            "special_mutations": plant.special_mutations,
+        },
+        by_name=True,
+    )
+
+
+def to_mutation(mutation: FastMutation) -> Mutation:
+    """转换回 pydantic 模型，会重新校验数据"""
+    return Mutation.model_validate(
+        {
+            "name": mutation.name,
+            "color": mutation.color,
+            "multiplier": mutation.multiplier,
+            "group_key": mutation.group_key,
+            "share_bit_index": mutation.share_bit_index,
+        },
+        by_name=True,
+    )
+
+
+def to_price_result(result: tuple[float, float, float, float, float]) -> PriceResult:
+    base_factor, special_factor, weight_factor, mutate_factor, total_price = result
+    return PriceResult(
+        base_factor=base_factor,
+        special_factor=special_factor,
+        weight_factor=weight_factor,
+        mutate_factor=mutate_factor,
+        total_price=total_price,
+    )
@@ -0,0 +1,93 @@
+import hashlib
+import io
+import os
+from collections.abc import Mapping
+from functools import lru_cache
+from importlib.resources import as_file, files
+from pathlib import Path
+
+import numpy as np
+import orjson
+
+__all__ = ["PLACEHOLDER", "image_path", "load_manifest", "store_images"]
+
+IMAGE_DIR = "images"
+MANIFEST_NAME = "manifest.json"
+THUMBNAIL_SIZE = 160
+"""缩略图最大边长 px，UI 以 80px 展示，保留两倍分辨率"""
+
+PLACEHOLDER = np.full((THUMBNAIL_SIZE, THUMBNAIL_SIZE, 3), 230, dtype=np.uint8)
+"""图片缺失时显示的浅灰色占位图"""
+
+
+def _image_dir() -> Path:
+    with as_file(files("fknc_calc") / IMAGE_DIR) as path:
+        return path
+
+
+def make_thumbnail(data: bytes, size: int = THUMBNAIL_SIZE) -> bytes:
+    """将原图等比缩小到 size 以内，统一编码为 PNG"""
+    # Pillow 仅在生成缩略图时需要
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGBA")
+        image.thumbnail((size, size))
+        output = io.BytesIO()
+        image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+@lru_cache(maxsize=1)
+def load_manifest() -> Mapping[str, str]:
+    """图片 URL -> 本地缩略图文件名，清单不存在时为空"""
+    try:
+        data = (_image_dir() / MANIFEST_NAME).read_bytes()
+    except FileNotFoundError:
+        return {}
+    return orjson.loads(data)
+
+
+def image_path(image_url: str) -> Path | None:
+    """作物图片的本地缩略图路径，未缓存时返回 None"""
+    name = load_manifest().get(image_url)
+    if name is None:
+        return None
+    path = _image_dir() / name
+    return path if path.is_file() else None
+
+
+def store_images(images: Mapping[str, bytes], root: Path | None = None) -> Path:
+    """
+    生成缩略图并写入本地图片库，返回清单路径。
+
+    缩略图以原图内容的哈希命名，内容相同的图片只保存一份，
+    图片更新后不再被清单引用的旧文件会被删除。
+    """
+    root = _image_dir() if root is None else root
+    root.mkdir(parents=True, exist_ok=True)
+
+    # 本次未能下载的图片沿用已有的缩略图
+    manifest_path = root / MANIFEST_NAME
+    manifest: dict[str, str] = (
+        orjson.loads(manifest_path.read_bytes()) if manifest_path.exists() else {}
+    )
+    for image_url, data in sorted(images.items()):
+        name = f"{hashlib.sha256(data).hexdigest()}.png"
+        path = root / name
+        if not path.exists():
+            path.write_bytes(make_thumbnail(data))
+        manifest[image_url] = name
+
+    referenced = set(manifest.values())
+    for path in root.glob("*.png"):
+        if path.name not in referenced:
+            path.unlink()
+
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_bytes(
+        orjson.dumps(manifest, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    )
+    os.replace(tmp_path, manifest_path)
+    load_manifest.cache_clear()
+    return manifest_path
@@ -0,0 +1,144 @@
+import heapq
+from collections.abc import Iterable
+
+from pydantic import BaseModel
+
+from fknc_calc import BASE_MUTATIONS, Plant, PriceResult
+from fknc_calc.cache import PRICE_CACHE
+from fknc_calc.catalog import Catalog
+from fknc_calc.rules import is_mutation_disabled
+
+__all__ = ["MutationCombo", "best_mutation_combos"]
+
+
+class MutationCombo(BaseModel):
+    base_mutation: str | None
+    """基础突变"""
+    special_mutation: str | None
+    """独占突变"""
+    mutations: tuple[str, ...]
+    """常规突变，按倍率降序"""
+    price: PriceResult
+
+
+def _conflict_masks(plant: Plant, names: list[str]) -> list[int]:
+    """
+    由 rules 推出两两互斥关系，
+
+    第 i 项的第 j 位表示 names[i] 与 names[j] 不能同时选择。
+    """
+    masks = [0] * len(names)
+    for i, a in enumerate(names):
+        for j, b in enumerate(names):
+            if i != j and is_mutation_disabled([a], plant, b):
+                masks[i] |= 1 << j
+                masks[j] |= 1 << i
+    return masks
+
+
+def _top_additive_sets(
+    multipliers: list[float],
+    conflicts: list[int],
+    top_k: int,
+) -> list[tuple[float, int]]:
+    """
+    分支定界搜索倍率之和最大的 top_k 个合法组合。
+
+    multipliers 须按降序排列，返回 (倍率之和, 组合掩码)，按和降序。
+    """
+    count = len(multipliers)
+    heap: list[tuple[float, int]] = []
+
+    def bound(index: int, total: float, blocked: int) -> float:
+        for j in range(index, count):
+            if not blocked >> j & 1:
+                total += multipliers[j]
+        return total
+
+    def search(index: int, total: float, chosen: int, blocked: int):
+        if len(heap) == top_k and bound(index, total, blocked) <= heap[0][0]:
+            return
+        if index == count:
+            if len(heap) < top_k:
+                heapq.heappush(heap, (total, chosen))
+            else:
+                heapq.heapreplace(heap, (total, chosen))
+            return
+
+        if not blocked >> index & 1:
+            search(
+                index + 1,
+                total + multipliers[index],
+                chosen | 1 << index,
+                blocked | conflicts[index],
+            )
+        search(index + 1, total, chosen, blocked | 1 << index)
+
+    search(0, 0.0, 0, 0)
+    return sorted(heap, reverse=True)
+
+
+def best_mutation_combos(
+    catalog: Catalog,
+    plant: Plant,
+    weight: float,
+    top_k: int = 5,
+    available: Iterable[str] | None = None,
+) -> list[MutationCombo]:
+    """
+    求使作物价格最高的 top_k 个合法突变组合。
+
+    基础突变与独占突变各取其一（取最大值，多选无意义），
+    常规突变满足 rules 的互斥规则。`available` 限定可获得的突变，
+    为 None 时不做限制。
+    """
+    if top_k <= 0:
+        return []
+    names = set(catalog.mutations_by_name) if available is None else set(available)
+
+    def sorted_by_multiplier(candidates: Iterable[str]) -> list[str]:
+        return sorted(
+            (name for name in candidates if name in names),
+            key=lambda name: catalog.mutation(name).multiplier,
+            reverse=True,
+        )
+
+    bases = [None] + sorted_by_multiplier(BASE_MUTATIONS)
+    specials = [None] + sorted_by_multiplier(plant.special_mutations or ())
+    additive = sorted_by_multiplier(
+        name
+        for name in catalog.mutations_by_name
+        if name not in BASE_MUTATIONS and name not in catalog.special_mutations
+    )
+
+    top_sets = _top_additive_sets(
+        [catalog.mutation(name).multiplier for name in additive],
+        _conflict_masks(plant, additive),
+        top_k,
+    )
+
+    # 对每组基础/独占突变，总价随常规突变之和单调递增，
+    # 因此全局前 top_k 必在各组各自的前 top_k 之中
+    candidates = []
+    for base in bases:
+        for special in specials:
+            factor = catalog.mutation(base).multiplier if base else 1
+            factor *= catalog.mutation(special).multiplier if special else 1
+            for total, chosen in top_sets:
+                candidates.append((factor * (1 + total), base, special, chosen))
+    candidates = heapq.nlargest(top_k, candidates, key=lambda c: c[0])
+
+    combos = []
+    for _, base, special, chosen in candidates:
+        mutations = tuple(name for i, name in enumerate(additive) if chosen >> i & 1)
+        selected = [name for name in (base, special) if name] + list(mutations)
+        price = PRICE_CACHE.price(catalog, plant, weight, selected)
+        combos.append(
+            MutationCombo(
+                base_mutation=base,
+                special_mutation=special,
+                mutations=mutations,
+                price=price,
+            )
+        )
+    return combos
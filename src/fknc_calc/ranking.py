@@ -0,0 +1,94 @@
+from collections.abc import Iterable
+from typing import NamedTuple
+
+import numpy as np
+
+from fknc_calc import calc_price_batch
+from fknc_calc.catalog import Catalog
+
+__all__ = ["ProfitTable", "profit_table", "selection_matrix"]
+
+
+class ProfitTable(NamedTuple):
+    """全部作物的收益数据，每个字段与 `Catalog.plants` 等长"""
+
+    weight: np.ndarray
+    """按重量百分比折算的作物重量 kg"""
+    total_price: np.ndarray
+    """售价"""
+    growth_time: np.ndarray
+    """长成所需时间 秒，生长速度未知时为 NaN"""
+    seed_price: np.ndarray
+    """种子价格，未知时为 NaN"""
+    net_profit: np.ndarray
+    """售价减去种子价格，种子价格未知时为 NaN"""
+    price_per_hour: np.ndarray
+    """每小时售价，生长速度未知时为 NaN"""
+    profit_per_hour: np.ndarray
+    """每小时净利润，生长速度或种子价格未知时为 NaN"""
+
+
+def selection_matrix(
+    catalog: Catalog,
+    mutations: Iterable[str],
+) -> np.ndarray:
+    """
+    将同一组突变应用到所有作物，
+
+    独占突变只计入拥有它的作物，不会被当作常规突变累加。
+    """
+    names = set(mutations)
+    selected = np.zeros((len(catalog.plants), len(catalog.mutations)), dtype=np.bool_)
+    for j, mutation in enumerate(catalog.mutations):
+        if mutation.name not in names:
+            continue
+        if mutation.name not in catalog.special_mutations:
+            selected[:, j] = True
+            continue
+        for i, plant in enumerate(catalog.plants):
+            selected[i, j] = mutation.name in (plant.special_mutations or ())
+    return selected
+
+
+def profit_table(
+    catalog: Catalog,
+    percent: float,
+    mutations: Iterable[str] = (),
+) -> ProfitTable:
+    """
+    一次性计算所有作物在给定重量百分比与突变下的售价、生长时间与每小时收益。
+
+    `mutations` 可同时包含基础突变、独占突变与常规突变。
+    """
+    plants = catalog.plants
+    # 与 UI 按百分比输入时的取整方式一致
+    weight = np.array(
+        [round(percent * plant.max_weight / 100, 3) for plant in plants],
+        dtype=np.float64,
+    )
+    prices = calc_price_batch(
+        list(plants),
+        list(catalog.mutations),
+        np.arange(len(plants)),
+        weight,
+        selection_matrix(catalog, mutations),
+    )
+
+    growth_speed = np.array([plant.growth_speed for plant in plants], dtype=np.float64)
+    growth_time = np.where(growth_speed > 0, growth_speed * weight, np.nan)
+    seed_price = np.array(
+        [np.nan if plant.seed_price is None else plant.seed_price for plant in plants],
+        dtype=np.float64,
+    )
+    net_profit = prices.total_price - seed_price
+
+    hours = growth_time / 3600
+    return ProfitTable(
+        weight=weight,
+        total_price=prices.total_price,
+        growth_time=growth_time,
+        seed_price=seed_price,
+        net_profit=net_profit,
+        price_per_hour=prices.total_price / hours,
+        profit_per_hour=net_profit / hours,
+    )
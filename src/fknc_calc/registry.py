@@ -0,0 +1,210 @@
+import operator
+from collections.abc import Iterable, Mapping
+from importlib.resources import files
+from types import MappingProxyType
+
+import numpy as np
+import orjson
+
+from fknc_calc import BASE_MUTATIONS, Mutation, Plant
+
+__all__ = ["MutationRegistry", "assign_bits", "load_bit_table"]
+
+MASK_BITS = 64
+BIT_TABLE_NAME = "mutation_bits.json"
+"""突变名称 -> 位序号，只追加、不重排，已保存的掩码与分享链接始终有效"""
+
+
+def load_bit_table() -> dict[str, int]:
+    try:
+        return orjson.loads((files("fknc_calc") / BIT_TABLE_NAME).read_bytes())
+    except FileNotFoundError:
+        return {}
+
+
+def assign_bits(
+    table: Mapping[str, int], mutations: Iterable[tuple[str, int | None]]
+) -> dict[str, int]:
+    """
+    为 (名称, 游戏的 shareBitIndex) 中尚未登记的突变追加位序号，返回新的位序号表。
+
+    已登记的突变保持原位序号，已删除突变的位序号也不再复用；
+    有 shareBitIndex 时以其为准，与已登记的位序号冲突时报错。
+    """
+    table = dict(table)
+    owner = {bit: name for name, bit in table.items()}
+    if len(owner) != len(table) or any(not 0 <= bit < MASK_BITS for bit in owner):
+        raise ValueError("无效的突变位序号表")
+
+    for name, share_bit_index in mutations:
+        bit = table.get(name)
+        if bit is not None:
+            if share_bit_index is not None and share_bit_index != bit:
+                raise ValueError(
+                    f"突变 {name} 的 shareBitIndex {share_bit_index} "
+                    f"与已登记的位序号 {bit} 不一致"
+                )
+            continue
+        if share_bit_index is None:
+            bit = next((i for i in range(MASK_BITS) if i not in owner), None)
+            if bit is None:
+                raise ValueError(f"突变数量超过 {MASK_BITS} 个，无法编码为掩码")
+        elif not 0 <= share_bit_index < MASK_BITS or share_bit_index in owner:
+            raise ValueError(
+                f"突变 {name} 的 shareBitIndex {share_bit_index} "
+                f"已被 {owner.get(share_bit_index, '其他突变')} 占用或超出范围"
+            )
+        else:
+            bit = share_bit_index
+        table[name] = bit
+        owner[bit] = name
+    return dict(sorted(table.items(), key=lambda item: item[1]))
+
+
+def _byte_tables(values: list[float], reduce) -> list[list[float]]:
+    """
+    按字节预计算查表：第 i 张表的第 b 项为
+
+    第 i 个字节取值为 b 时，对应各位数值的归约结果。
+    """
+    tables = []
+    for offset in range(0, MASK_BITS, 8):
+        chunk = values[offset : offset + 8]
+        table = [0.0] * 256
+        for byte in range(1, 256):
+            low = byte & -byte
+            bit = low.bit_length() - 1
+            item = chunk[bit] if bit < len(chunk) else 0.0
+            table[byte] = reduce(table[byte ^ low], item)
+        tables.append(table)
+    return tables
+
+
+class MutationRegistry:
+    """
+    突变注册表：为每个突变分配固定的位序号，
+
+    使任意突变组合都能以一个 64 位整数掩码表示。
+    """
+
+    def __init__(
+        self,
+        mutations: Iterable[Mutation],
+        bit_table: Mapping[str, int] | None = None,
+    ):
+        """
+        Args:
+            mutations: 要编码的突变
+            bit_table: 位序号表，默认读取 mutation_bits.json
+        """
+        mutations = list(mutations)
+        if bit_table is None:
+            bit_table = load_bit_table()
+
+        # 不为未登记的突变临时分配位序号，以免与之后登记的结果不一致
+        missing = [m.name for m in mutations if m.name not in bit_table]
+        if missing:
+            raise ValueError(f"突变未登记位序号: {'、'.join(missing)}，请先同步数据")
+        assign_bits(bit_table, ((m.name, m.share_bit_index) for m in mutations))
+
+        ordered = sorted(mutations, key=lambda m: bit_table[m.name])
+        bits = [bit_table[m.name] for m in ordered]
+
+        self.mutations: tuple[Mutation, ...] = tuple(ordered)
+        """按位序号排列的突变"""
+        self.bits: tuple[int, ...] = tuple(bits)
+        """`mutations` 中各突变的位序号"""
+        self.bit_of: Mapping[str, int] = MappingProxyType(
+            {m.name: bit for m, bit in zip(ordered, bits)}
+        )
+        self._by_bit: dict[int, Mutation] = dict(zip(bits, ordered))
+        self.all_mask: int = self.encode(self.bit_of)
+        self.base_mask: int = self.encode(
+            name for name in BASE_MUTATIONS if name in self.bit_of
+        )
+        self._special_masks: dict[str, int] = {}
+
+        multipliers = [0.0] * MASK_BITS
+        for m, bit in zip(ordered, bits):
+            multipliers[bit] = m.multiplier
+        self._sum_tables = _byte_tables(multipliers, operator.add)
+        self._max_tables = _byte_tables(multipliers, max)
+
+    def __len__(self) -> int:
+        return len(self.bit_of)
+
+    def encode(self, names: Iterable[str]) -> int:
+        """将突变名称集合编码为掩码"""
+        mask = 0
+        for name in names:
+            mask |= 1 << self.bit_of[name]
+        return mask
+
+    def decode(self, mask: int) -> list[str]:
+        """将掩码解码为按位序号排列的突变名称"""
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self._by_bit[low.bit_length() - 1].name)
+            mask ^= low
+        return names
+
+    def special_mask(self, plant: Plant) -> int:
+        """植物独占突变对应的掩码，不含基础突变"""
+        mask = self._special_masks.get(plant.name)
+        if mask is None:
+            names = plant.special_mutations or ()
+            mask = (
+                self.encode(name for name in names if name in self.bit_of)
+                & ~self.base_mask
+            )
+            self._special_masks[plant.name] = mask
+        return mask
+
+    def _reduce(self, tables: list[list[float]], mask: int, reduce) -> float:
+        result = 0.0
+        for table in tables:
+            if mask & 0xFF:
+                result = reduce(result, table[mask & 0xFF])
+            mask >>= 8
+        return result
+
+    def base_factor(self, mask: int) -> float:
+        """基础突变因数：所选基础突变倍率的最大值，至少为 1"""
+        return max(1.0, self._reduce(self._max_tables, mask & self.base_mask, max))
+
+    def special_factor(self, mask: int, plant: Plant) -> float:
+        """独占突变因数：所选独占突变倍率的最大值，至少为 1"""
+        special = mask & self.special_mask(plant)
+        return max(1.0, self._reduce(self._max_tables, special, max))
+
+    def mutate_factor(self, mask: int, plant: Plant) -> float:
+        """常规突变因数之和，不带额外的 1"""
+        rest = mask & ~self.base_mask & ~self.special_mask(plant)
+        return self._reduce(self._sum_tables, rest, operator.add)
+
+    def unpack(self, masks: np.ndarray) -> np.ndarray:
+        """
+        将掩码数组展开为布尔矩阵，
+
+        列顺序与 `mutations` 一致，可直接传给 `calc_price_batch`。
+        """
+        masks = np.asarray(masks, dtype=np.uint64)
+        bits = np.array(self.bits, dtype=np.uint64)
+        return ((masks[..., None] >> bits) & np.uint64(1)).astype(np.bool_)
+
+    def pack(self, selected: np.ndarray) -> np.ndarray:
+        """`unpack` 的逆运算"""
+        selected = np.asarray(selected, dtype=np.uint64)
+        bits = np.array(self.bits, dtype=np.uint64)
+        return np.bitwise_or.reduce(selected << bits, axis=-1)
+
+    def to_token(self, mask: int) -> str:
+        """掩码的紧凑文本形式，可用于分享链接"""
+        return f"{mask:x}"
+
+    def from_token(self, token: str) -> int:
+        mask = int(token, 16)
+        if mask & ~self.all_mask:
+            raise ValueError("无效的突变掩码")
+        return mask
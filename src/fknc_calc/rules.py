@@ -1,18 +1,61 @@
+import heapq
+import weakref
+from collections.abc import Iterable, Mapping
+from importlib.resources import files
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, ConfigDict
+from pydantic.alias_generators import to_camel
+
 from fknc_calc import Plant
 
-__all__ = ["is_mutation_disabled"]
+if TYPE_CHECKING:
+    from fknc_calc.registry import MutationRegistry
 
-# 配方数据：每种突变产物所需的原料
-RECIPES = [
-    {"ingredients": ["亮晶晶", "琥珀"], "result": "橙钻"},
-    {"ingredients": ["太阳耀斑", "灼热"], "result": "流火"},
-    {"ingredients": ["陶化", "灼热"], "result": "瓷化"},
-    {"ingredients": ["生机", "潮湿"], "result": "琥珀"},
-    {"ingredients": ["沙尘", "潮湿"], "result": "陶化"},
-    {"ingredients": ["潮湿", "结霜"], "result": "冰冻"},
+__all__ = [
+    "RULES",
+    "Recipe",
+    "RuleEngine",
+    "RuleSet",
+    "is_mutation_disabled",
+    "load_rules",
 ]
 
 
+class Recipe(BaseModel):
+    model_config = ConfigDict(
+        alias_generator=to_camel,
+        validate_by_alias=True,
+    )
+
+    ingredients: tuple[str, ...]
+    result: str
+
+
+class RuleSet(BaseModel):
+    model_config = ConfigDict(
+        alias_generator=to_camel,
+        validate_by_alias=True,
+    )
+
+    never_disabled: frozenset[str] = frozenset()
+    """永不禁用的突变"""
+    recipes: tuple[Recipe, ...]
+    """配方数据：每种突变产物所需的原料"""
+
+
+def load_rules() -> RuleSet:
+    data = (files("fknc_calc") / "rules.json").read_bytes()
+    return RuleSet.model_validate_json(data)
+
+
+RULE_SET = load_rules()
+
+RECIPES = [recipe.model_dump() for recipe in RULE_SET.recipes]
+
+NEVER_DISABLED = RULE_SET.never_disabled
+
+
 def get_all_ingredients(mutation: str, visited: set[str] | None = None) -> list[str]:
     """
     递归获取某个突变项的所有原料（包括直接和间接原料）
@@ -44,6 +87,138 @@ def get_all_ingredients(mutation: str, visited: set[str] | None = None) -> list[
     return all_ingredients
 
 
+def _find_cycle(graph: Mapping[str, Iterable[str]]) -> list[str]:
+    """在有向图中找出一个环，返回环上的节点（首尾相同）"""
+    state: dict[str, int] = {}  # 1: 在栈中, 2: 已完成
+    stack: list[str] = []
+
+    def visit(node: str) -> list[str] | None:
+        state[node] = 1
+        stack.append(node)
+        for nxt in graph.get(node, ()):
+            if state.get(nxt) == 1:
+                return stack[stack.index(nxt) :] + [nxt]
+            if nxt not in state and (cycle := visit(nxt)):
+                return cycle
+        stack.pop()
+        state[node] = 2
+        return None
+
+    for node in graph:
+        if node not in state and (cycle := visit(node)):
+            return cycle
+    return []
+
+
+def topological_order(ingredients: Mapping[str, Iterable[str]]) -> tuple[str, ...]:
+    """
+    配方产物的拓扑序：产物总排在作为其原料的其他产物之前。
+
+    无依赖关系的产物之间保持声明顺序，存在循环依赖时抛出 ValueError。
+    """
+    position = {product: i for i, product in enumerate(ingredients)}
+    # 被多少个尚未输出的产物用作原料
+    pending = dict.fromkeys(ingredients, 0)
+    for product, items in ingredients.items():
+        for item in items:
+            if item in pending:
+                pending[item] += 1
+
+    ready = [position[p] for p, count in pending.items() if count == 0]
+    heapq.heapify(ready)
+    products = list(ingredients)
+    order: list[str] = []
+    while ready:
+        product = products[heapq.heappop(ready)]
+        order.append(product)
+        for item in ingredients[product]:
+            if item in pending:
+                pending[item] -= 1
+                if pending[item] == 0:
+                    heapq.heappush(ready, position[item])
+
+    if len(order) != len(products):
+        cycle = _find_cycle(ingredients)
+        raise ValueError(f"配方存在循环依赖: {' -> '.join(cycle)}")
+    return tuple(order)
+
+
+class RuleEngine:
+    """
+    将配方编译为有向无环图，预先计算各产物原料的传递闭包，
+
+    已选中某个产物时，它的所有直接与间接原料（除永不禁用的突变外）都不能再被选中。
+    """
+
+    def __init__(self, rules: RuleSet = RULE_SET):
+        self.never_disabled: frozenset[str] = rules.never_disabled
+
+        # 同一产物有多个配方时合并其原料
+        ingredients: dict[str, dict[str, None]] = {}
+        for recipe in rules.recipes:
+            ingredients.setdefault(recipe.result, {}).update(
+                dict.fromkeys(recipe.ingredients)
+            )
+
+        self.order: tuple[str, ...] = topological_order(ingredients)
+        """配方产物的拓扑序，UI 按此顺序排列"""
+
+        # 按拓扑逆序累积，原料的闭包总是先于产物求出
+        closure: dict[str, frozenset[str]] = {}
+        for product in reversed(self.order):
+            items = set(ingredients[product])
+            for item in ingredients[product]:
+                items |= closure.get(item, frozenset())
+            closure[product] = frozenset(items)
+
+        self.excludes: dict[str, frozenset[str]] = {
+            product: closure[product] - self.never_disabled for product in self.order
+        }
+        """产物 -> 选中它后被禁用的突变"""
+        self._masks: weakref.WeakKeyDictionary[
+            MutationRegistry, tuple[tuple[int, int], ...]
+        ] = weakref.WeakKeyDictionary()
+
+    def disabled_mutations(self, selected: Iterable[str]) -> frozenset[str]:
+        """一次性求出当前选择下所有被禁用的突变"""
+        disabled: set[str] = set()
+        for name in selected:
+            excluded = self.excludes.get(name)
+            if excluded:
+                disabled |= excluded
+        return frozenset(disabled)
+
+    def is_disabled(self, selected: Iterable[str], new_mutation: str) -> bool:
+        if new_mutation in self.never_disabled:
+            return False
+        return any(new_mutation in self.excludes.get(name, ()) for name in selected)
+
+    def disabled_mask(self, registry: "MutationRegistry", mask: int) -> int:
+        """`disabled_mutations` 的掩码版本"""
+        product_masks = self._masks.get(registry)
+        if product_masks is None:
+            product_masks = tuple(
+                (
+                    1 << registry.bit_of[product],
+                    registry.encode(
+                        name for name in excluded if name in registry.bit_of
+                    ),
+                )
+                for product, excluded in self.excludes.items()
+                if product in registry.bit_of
+            )
+            self._masks[registry] = product_masks
+
+        disabled = 0
+        for product_bit, excluded in product_masks:
+            if mask & product_bit:
+                disabled |= excluded
+        return disabled
+
+
+RULES = RuleEngine()
+
+
 def is_mutation_disabled(
     selected_mutations: list[str],
     plant: Plant,
@@ -60,30 +235,7 @@ def is_mutation_disabled(
     Returns:
         True表示禁用（不可选择），False表示可用（可选择）
     """
-    if new_mutation == "潮湿":
-        return False
-
-    if new_mutation == "灼热":
-        has_flow_fire = "流火" in selected_mutations
-        has_porcelain = "瓷化" in selected_mutations
-        return has_flow_fire or has_porcelain
-
-    if new_mutation == "沙尘" and "潮湿" in selected_mutations:
-        return "陶化" in selected_mutations or "瓷化" in selected_mutations
-
-    # 通用规则：检查配方链的互斥关系
-    # 如果已选中某个产物，那么它的所有原料都不能再被选中
-    for recipe in RECIPES:
-        if recipe["result"] in selected_mutations:
-            # 获取该产物的所有原料（过滤掉永不禁用的"潮湿"）
-            all_ingredients = [
-                ing for ing in get_all_ingredients(recipe["result"]) if ing != "潮湿"
-            ]
-            # 如果新突变是这些原料之一，则禁用
-            if new_mutation in all_ingredients:
-                return True
-
-    return False
+    return RULES.is_disabled(selected_mutations, new_mutation)
 
 
 def is_mutation_allowed(
@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+from http import HTTPStatus
+from urllib.parse import unquote
+
+import numpy as np
+import orjson
+from pydantic import BaseModel, ValidationError
+
+from fknc_calc import calc_price_batch, encode_mutation_sets
+from fknc_calc.catalog import Catalog
+from fknc_calc.rules import is_mutation_disabled
+
+__all__ = [
+    "PriceBatcher",
+    "PriceRequest",
+    "PricingService",
+    "RuleCheckRequest",
+    "serve",
+]
+
+KEEP_ALIVE_TIMEOUT = 30.0
+"""空闲连接保持的秒数"""
+MAX_BODY = 1 << 20
+
+
+class PriceRequest(BaseModel):
+    plant: str
+    weight: float
+    """作物重量 kg"""
+    mutations: list[str] = []
+
+
+class BatchPriceRequest(BaseModel):
+    items: list[PriceRequest]
+
+
+class RuleCheckRequest(BaseModel):
+    selected: list[str]
+    """已选中的突变"""
+    mutation: str
+    """要检查的突变"""
+    plant: str | None = None
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _result(prices, i: int) -> dict[str, float]:
+    return {field: float(getattr(prices, field)[i]) for field in prices._fields}
+
+
+class PriceBatcher:
+    """
+    将同一时刻到达的单次计价请求合并为一次 `calc_price_batch`。
+
+    第一个请求到达后等待 max_delay 秒（默认只等到事件循环的下一轮），
+    期间到达的请求一起计算，达到 max_batch 时立即计算。
+    """
+
+    def __init__(self, catalog: Catalog, max_batch: int = 1024, max_delay: float = 0):
+        self.catalog = catalog
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: list[tuple[PriceRequest, asyncio.Future]] = []
+        self._handle: asyncio.Handle | asyncio.TimerHandle | None = None
+        self.batches = 0
+        """已执行的批次数"""
+
+    def validate(self, request: PriceRequest):
+        plant = self.catalog.plants_by_name.get(request.plant)
+        if plant is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"未知的作物: {request.plant}")
+        for name in request.mutations:
+            if name not in self.catalog.mutations_by_name:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"未知的突变: {name}")
+        # 与 calc_price 的校验一致
+        if len(set(request.mutations)) != len(request.mutations):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "重复的突变")
+        if not request.weight >= 0 or request.weight > plant.max_weight:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "无效的作物重量！")
+
+    def price_many(self, requests: list[PriceRequest]) -> list[dict[str, float]]:
+        """立即计算一批已校验的请求"""
+        if not requests:
+            return []
+        self.batches += 1
+        # 只传入本批次涉及的作物，减少批量计算的准备开销
+        names = list(dict.fromkeys(request.plant for request in requests))
+        index = {name: i for i, name in enumerate(names)}
+        mutations = list(self.catalog.mutations)
+        prices = calc_price_batch(
+            [self.catalog.plant(name) for name in names],
+            mutations,
+            np.array([index[request.plant] for request in requests]),
+            np.array([request.weight for request in requests]),
+            encode_mutation_sets(mutations, (r.mutations for r in requests)),
+        )
+        return [_result(prices, i) for i in range(len(requests))]
+
+    async def price(self, request: PriceRequest) -> dict[str, float]:
+        self.validate(request)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._handle is None:
+            if self.max_delay > 0:
+                self._handle = loop.call_later(self.max_delay, self._flush)
+            else:
+                self._handle = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            results = self.price_many([request for request, _ in pending])
+        except Exception:
+            # 整批失败时逐个重新计算，出错的请求不影响同批的其他请求
+            for request, future in pending:
+                try:
+                    result = self.price_many([request])[0]
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                if not future.done():
+                    future.set_result(result)
+            return
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class PricingService:
+    """HTTP/JSON 接口，路由到作物、突变查询，计价与规则检查"""
+
+    def __init__(self, catalog: Catalog, batcher: PriceBatcher | None = None):
+        self.catalog = catalog
+        self.batcher = PriceBatcher(catalog) if batcher is None else batcher
+        self._plants = [
+            plant.model_dump(by_alias=True, mode="json") for plant in catalog.plants
+        ]
+        self._mutations = {
+            mutation.name: mutation.model_dump(by_alias=True, mode="json")
+            for mutation in catalog.mutations
+        }
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> object:
+        parts = [unquote(part) for part in path.split("?", 1)[0].split("/") if part]
+        match method, parts:
+            case "GET", ["plants"]:
+                return self._plants
+            case "GET", ["plants", name]:
+                if name not in self.catalog.plant_index:
+                    raise HTTPError(HTTPStatus.NOT_FOUND, f"未知的作物: {name}")
+                return self._plants[self.catalog.plant_index[name]]
+            case "GET", ["mutations"]:
+                return list(self._mutations.values())
+            case "GET", ["mutations", name]:
+                if name not in self._mutations:
+                    raise HTTPError(HTTPStatus.NOT_FOUND, f"未知的突变: {name}")
+                return self._mutations[name]
+            case "POST", ["price"]:
+                request = PriceRequest.model_validate_json(body)
+                return await self.batcher.price(request)
+            case "POST", ["price", "batch"]:
+                requests = BatchPriceRequest.model_validate_json(body).items
+                for request in requests:
+                    self.batcher.validate(request)
+                return self.batcher.price_many(requests)
+            case "POST", ["rules", "check"]:
+                return self.check_rule(RuleCheckRequest.model_validate_json(body))
+            case _, [("plants" | "mutations" | "price" | "rules"), *_]:
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "不支持的请求方法")
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"未知的路径: {path}")
+
+    def check_rule(self, request: RuleCheckRequest) -> dict[str, bool]:
+        plant = None
+        if request.plant is not None:
+            plant = self.catalog.plants_by_name.get(request.plant)
+            if plant is None:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"未知的作物: {request.plant}")
+        disabled = is_mutation_disabled(request.selected, plant, request.mutation)
+        return {"disabled": disabled}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个连接，HTTP/1.1 默认保持连接以复用"""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(
+                        reader.readline(), KEEP_ALIVE_TIMEOUT
+                    )
+                except TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+
+                method, path, version = request_line.decode("latin-1").split()
+                headers: dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self._respond(
+                        writer,
+                        HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                        {"error": "请求体过大"},
+                        False,
+                    )
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = (
+                    connection != "close"
+                    if version == "HTTP/1.1"
+                    else connection == "keep-alive"
+                )
+
+                try:
+                    status, payload = (
+                        HTTPStatus.OK,
+                        await self.dispatch(method, path, body),
+                    )
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except ValidationError as e:
+                    status, payload = (
+                        HTTPStatus.BAD_REQUEST,
+                        {"error": f"输入数据无效: {e}"},
+                    )
+                except Exception as e:
+                    status, payload = (
+                        HTTPStatus.INTERNAL_SERVER_ERROR,
+                        {"error": f"发生错误: {e}"},
+                    )
+
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        payload: object,
+        keep_alive: bool,
+    ):
+        body = orjson.dumps(payload)
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, max_delay: float = 0):
+    catalog = Catalog.load()
+    service = PricingService(catalog, PriceBatcher(catalog, max_delay=max_delay))
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"计价服务已启动: http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="疯狂农场计价服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--max-delay",
+        type=float,
+        default=0,
+        help="合并计价请求时最多等待的秒数，默认只合并同一时刻到达的请求",
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_delay))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
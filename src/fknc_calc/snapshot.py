@@ -0,0 +1,119 @@
+import hashlib
+import os
+import struct
+from importlib.resources import files
+from pathlib import Path
+
+from fknc_calc import Mutation, Plant, parse_data
+
+__all__ = ["build_snapshot", "content_hash", "load_snapshot"]
+
+SNAPSHOT_NAME = "catalog.snapshot"
+SNAPSHOT_MAGIC = b"FKNCSNAP"
+SNAPSHOT_VERSION = 1
+"""快照格式变化时递增"""
+
+# 文件头：魔数、格式版本、源数据哈希、植物数量、突变数量
+# 其后为各条记录的偏移表（uint32），最后是逐条紧凑 JSON 记录
+_HEADER = struct.Struct("<8sI32sII")
+
+
+def content_hash(plants_data: bytes, mutations_data: bytes) -> bytes:
+    """源数据文件的内容哈希"""
+    digest = hashlib.sha256()
+    digest.update(plants_data)
+    digest.update(b"\0")
+    digest.update(mutations_data)
+    return digest.digest()
+
+
+def build_snapshot(package_dir: Path | None = None) -> Path:
+    """
+    将 plants.json 与 mutations.json 编译为快照文件。
+
+    快照中的记录已排好序，加载时逐条交给 pydantic-core 直接解析校验，
+    省去中间的 Python 对象与排序。
+    快照写入数据文件所在的目录 `package_dir`，默认为源码树中的包目录；
+    已安装的包目录通常不可写，此时报错。
+    """
+    if package_dir is None:
+        package_dir = Path(__file__).resolve().parent
+    plants_data = (package_dir / "plants.json").read_bytes()
+    mutations_data = (package_dir / "mutations.json").read_bytes()
+
+    plants, mutations = parse_data(plants_data, mutations_data)
+    records = [model.model_dump_json(by_alias=True).encode() for model in plants]
+    records += [model.model_dump_json(by_alias=True).encode() for model in mutations]
+
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_VERSION,
+        content_hash(plants_data, mutations_data),
+        len(plants),
+        len(mutations),
+    )
+
+    path = package_dir / SNAPSHOT_NAME
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.writelines(records)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_snapshot(
+    plants_data: bytes, mutations_data: bytes
+) -> tuple[list[Plant], list[Mutation]] | None:
+    """
+    读取快照文件。
+
+    快照不存在、损坏、版本不符或与源数据哈希不一致时返回 None，由调用方回退到 JSON。
+    """
+    try:
+        snapshot = (files("fknc_calc") / SNAPSHOT_NAME).read_bytes()
+    except OSError:
+        return None
+    try:
+        return _parse_snapshot(snapshot, plants_data, mutations_data)
+    except (struct.error, ValueError):
+        # 文件被截断，或模型结构变化后记录无法通过校验（ValidationError 是 ValueError）
+        return None
+
+
+def _parse_snapshot(
+    snapshot: bytes, plants_data: bytes, mutations_data: bytes
+) -> tuple[list[Plant], list[Mutation]] | None:
+
+    if len(snapshot) < _HEADER.size:
+        return None
+    magic, version, digest, plant_count, mutation_count = _HEADER.unpack_from(snapshot)
+    if (
+        magic != SNAPSHOT_MAGIC
+        or version != SNAPSHOT_VERSION
+        or digest != content_hash(plants_data, mutations_data)
+    ):
+        return None
+
+    count = plant_count + mutation_count
+    offsets = struct.unpack_from(f"<{count + 1}I", snapshot, _HEADER.size)
+    start = _HEADER.size + 4 * (count + 1)
+    if start + offsets[-1] != len(snapshot):
+        return None
+    data = snapshot[start:]
+
+    records = [data[offsets[i] : offsets[i + 1]] for i in range(count)]
+    validate_plant = Plant.__pydantic_validator__.validate_json
+    validate_mutation = Mutation.__pydantic_validator__.validate_json
+    plants = [validate_plant(record) for record in records[:plant_count]]
+    mutations = [validate_mutation(record) for record in records[plant_count:]]
+    return plants, mutations
+
+
+if __name__ == "__main__":
+    print(f"已生成快照: {build_snapshot()}")
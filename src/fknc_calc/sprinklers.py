@@ -0,0 +1,129 @@
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+from fknc_calc import calc_price_batch
+from fknc_calc.catalog import Catalog
+from fknc_calc.ranking import selection_matrix
+
+__all__ = [
+    "GIANT_FACTORS",
+    "SPRINKLERS",
+    "expected_value",
+    "expected_values",
+    "monte_carlo_values",
+    "price_factors",
+]
+
+SPRINKLERS: dict[str, float] = {
+    "无": 1.0,
+    "简易": 1.2,
+    "简易标准": 1.7,
+    "简易标准白银": 2.4,
+    "简易标准白银黄金": 3.4,
+}
+"""洒水器类型系数 k，见 SPRINKERS.md"""
+
+GIANT_FACTORS: tuple[float, ...] = (1.0, 5.0)
+"""巨大化系数 G：普通状态、巨大化状态"""
+
+WEIGHT_DENOMINATOR = 34
+
+# E[x^1.5], x ~ U(1, 2)
+_X_MOMENT = 2 / 5 * (2**2.5 - 1)
+
+
+def expected_value(
+    p: np.ndarray | float,
+    max_weight: np.ndarray | float,
+    k: np.ndarray | float,
+    g: np.ndarray | float,
+) -> np.ndarray:
+    """
+    E[W] = p·(w·k·G/34)^1.5·(2/5)(2^2.5−1)，参数按 numpy 规则广播。
+    """
+    c = np.asarray(max_weight) * np.asarray(k) * np.asarray(g) / WEIGHT_DENOMINATOR
+    return np.asarray(p) * c**1.5 * _X_MOMENT
+
+
+def price_factors(catalog: Catalog, mutations: Iterable[str] = ()) -> np.ndarray:
+    """
+    每种作物的价值转换比例系数 p，
+
+    即价格系数与各项突变因数之积，不含重量因数。
+    """
+    max_weight = np.array([plant.max_weight for plant in catalog.plants])
+    prices = calc_price_batch(
+        list(catalog.plants),
+        list(catalog.mutations),
+        np.arange(len(catalog.plants)),
+        max_weight,
+        selection_matrix(catalog, mutations),
+    )
+    return prices.total_price / prices.weight_factor
+
+
+def _grid(
+    catalog: Catalog,
+    tiers: Sequence[str] | None,
+    giants: Sequence[float],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    tiers = list(SPRINKLERS) if tiers is None else tiers
+    w = np.array([plant.max_weight for plant in catalog.plants])[:, None, None]
+    k = np.array([SPRINKLERS[tier] for tier in tiers])[None, :, None]
+    g = np.asarray(giants, dtype=np.float64)[None, None, :]
+    return w, k, g
+
+
+def expected_values(
+    catalog: Catalog,
+    mutations: Iterable[str] = (),
+    tiers: Sequence[str] | None = None,
+    giants: Sequence[float] = GIANT_FACTORS,
+) -> np.ndarray:
+    """
+    所有作物 × 洒水器类型 × 巨大化系数 的期望价值，
+
+    返回形状为 (作物数, 类型数, 巨大化系数数) 的数组。
+    """
+    p = price_factors(catalog, mutations)[:, None, None]
+    w, k, g = _grid(catalog, tiers, giants)
+    return expected_value(p, w, k, g)
+
+
+def monte_carlo_values(
+    catalog: Catalog,
+    mutations: Iterable[str] = (),
+    tiers: Sequence[str] | None = None,
+    giants: Sequence[float] = GIANT_FACTORS,
+    samples: int = 100_000,
+    chunk: int = 1 << 16,
+    rng: np.random.Generator | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    蒙特卡洛估计期望价值，用于校验 `expected_values` 的推导。
+
+    每格独立抽取 x ~ U(1,2)，得到重量 w·k·G·x/34，再按 p·重量^1.5 计算价值，
+    不经过闭式解中的 p·C^1.5 与 E[x^1.5]。每批共抽取约 `chunk` 个样本，
+    内存与样本数无关。返回 (均值, 标准误)，形状与 `expected_values` 相同。
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    p = price_factors(catalog, mutations)[:, None, None]
+    w, k, g = _grid(catalog, tiers, giants)
+    p, w, k, g = np.broadcast_arrays(p, w, k, g)
+    shape = p.shape
+    p, w, k, g = (a.reshape(-1, 1) for a in (p, w, k, g))
+
+    total = np.zeros((p.shape[0], 1))
+    total_sq = np.zeros((p.shape[0], 1))
+    step = max(chunk // p.shape[0], 1)
+    for start in range(0, samples, step):
+        x = rng.uniform(1.0, 2.0, size=(p.shape[0], min(step, samples - start)))
+        weight = w * k * g * x / WEIGHT_DENOMINATOR
+        values = p * weight**1.5
+        total += values.sum(axis=1, keepdims=True)
+        total_sq += (values * values).sum(axis=1, keepdims=True)
+
+    mean = total / samples
+    variance = np.maximum(total_sq / samples - mean**2, 0.0)
+    return mean.reshape(shape), np.sqrt(variance / samples).reshape(shape)
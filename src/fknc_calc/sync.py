@@ -0,0 +1,333 @@
+import base64
+import gzip
+import os
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from pathlib import Path
+
+import orjson
+from pydantic import BaseModel, ConfigDict
+from pydantic.alias_generators import to_camel
+
+from fknc_calc.registry import BIT_TABLE_NAME, assign_bits
+from fknc_calc.snapshot import content_hash
+
+__all__ = [
+    "DataDiff",
+    "DataVersion",
+    "HistoryEntry",
+    "RecordDiff",
+    "SyncResult",
+    "diff_records",
+    "find_game_data",
+    "load_game_data",
+    "load_history",
+    "load_version",
+    "read_data_version",
+    "sync_game_data",
+]
+
+GAME_DATA_KEY = "fknc_game_data"
+"""网页在 localStorage 中保存游戏数据所用的键"""
+DATA_VERSION_NAME = "data_version.json"
+HISTORY_INDEX = "index.json"
+
+# 游戏数据中与计算无关、每次都可能变化的突变字段
+_MUTATION_EXCLUDED = frozenset({"sortOrder", "isActive"})
+
+
+class _CamelModel(BaseModel):
+    model_config = ConfigDict(
+        alias_generator=to_camel,
+        validate_by_alias=True,
+        validate_by_name=True,
+    )
+
+
+class RecordDiff(_CamelModel):
+    added: list[str] = []
+    removed: list[str] = []
+    changed: dict[str, list[str]] = {}
+    """名称 -> 变化的字段"""
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        parts = [
+            f"{label} {len(names)}"
+            for label, names in [
+                ("新增", self.added),
+                ("删除", self.removed),
+                ("变化", self.changed),
+            ]
+            if names
+        ]
+        return "，".join(parts) or "无变化"
+
+
+class DataDiff(_CamelModel):
+    plants: RecordDiff = RecordDiff()
+    mutations: RecordDiff = RecordDiff()
+
+    @property
+    def empty(self) -> bool:
+        return self.plants.empty and self.mutations.empty
+
+
+class DataVersion(_CamelModel):
+    version: int
+    content_hash: str
+    """plants.json 与 mutations.json 的内容哈希，与预编译快照中记录的一致"""
+
+
+class HistoryEntry(DataVersion):
+    created_at: datetime
+    diff: DataDiff
+    """相对上一版本的变化"""
+
+
+class SyncResult(BaseModel):
+    diff: DataDiff
+    version: DataVersion
+    written: list[Path]
+    """内容有变化、实际写入的文件"""
+
+
+def _parse_json(value: object) -> object:
+    if isinstance(value, (str, bytes)):
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            return None
+    return value
+
+
+def find_game_data(data: object) -> dict | None:
+    """
+    在解析后的 JSON 中查找游戏数据，即同时带有 crops 与 mutations 的对象。
+
+    支持 game_data.json 本身、localStorage 导出（键值对象、`{name, value}` 列表
+    或 Playwright 的 storage_state）以及 HAR 记录中的响应内容。
+    有多处匹配时取最后一处，即 HAR 中最新的响应。
+    """
+    if isinstance(data, list):
+        for item in reversed(data):
+            if (found := find_game_data(item)) is not None:
+                return found
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    if isinstance(data.get("crops"), list) and isinstance(data.get("mutations"), list):
+        return data
+    if GAME_DATA_KEY in data:
+        return find_game_data(_parse_json(data[GAME_DATA_KEY]))
+    if data.get("name") == GAME_DATA_KEY and "value" in data:
+        return find_game_data(_parse_json(data["value"]))
+    # HAR 的响应内容：文本可能经过 base64 编码
+    if isinstance(data.get("text"), str) and "mimeType" in data:
+        text = data["text"]
+        if data.get("encoding") == "base64":
+            text = base64.b64decode(text)
+        return find_game_data(_parse_json(text))
+
+    for value in reversed(list(data.values())):
+        if (found := find_game_data(value)) is not None:
+            return found
+    return None
+
+
+def load_game_data(path: Path) -> dict:
+    """从 game_data.json、localStorage 导出或 HAR 文件中读取游戏数据"""
+    game_data = find_game_data(orjson.loads(path.read_bytes()))
+    if game_data is None:
+        raise ValueError(f"未在 {path} 中找到游戏数据")
+    return game_data
+
+
+def diff_records(old: Iterable[dict], new: Iterable[dict]) -> RecordDiff:
+    """按 name 逐条比较两组记录"""
+    old_by_name = {record["name"]: record for record in old}
+    new_by_name = {record["name"]: record for record in new}
+    changed = {}
+    for name, record in new_by_name.items():
+        previous = old_by_name.get(name)
+        if previous is None or previous == record:
+            continue
+        changed[name] = sorted(
+            key
+            for key in previous.keys() | record.keys()
+            if previous.get(key) != record.get(key)
+        )
+    return RecordDiff(
+        added=[name for name in new_by_name if name not in old_by_name],
+        removed=[name for name in old_by_name if name not in new_by_name],
+        changed=changed,
+    )
+
+
+def clean_mutation(mutation: dict) -> dict:
+    return {k: v for k, v in mutation.items() if k not in _MUTATION_EXCLUDED}
+
+
+def _encode(data: object) -> bytes:
+    # 与 json.dump(..., ensure_ascii=False, indent=2) 的输出逐字节相同
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """内容不同时才原子地写入文件，返回是否写入"""
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def _read_records(path: Path) -> list[dict]:
+    try:
+        return orjson.loads(path.read_bytes())
+    except FileNotFoundError:
+        return []
+
+
+def read_data_version(package_dir: Path) -> DataVersion | None:
+    try:
+        return DataVersion.model_validate_json(
+            (package_dir / DATA_VERSION_NAME).read_bytes()
+        )
+    except FileNotFoundError:
+        return None
+
+
+def load_history(history_dir: Path) -> list[HistoryEntry]:
+    try:
+        data = orjson.loads((history_dir / HISTORY_INDEX).read_bytes())
+    except FileNotFoundError:
+        return []
+    return [HistoryEntry.model_validate(entry) for entry in data]
+
+
+def _version_path(history_dir: Path, version: DataVersion) -> Path:
+    return history_dir / f"v{version.version:04d}-{version.content_hash[:12]}.json.gz"
+
+
+def load_version(history_dir: Path, version: int) -> tuple[list[dict], list[dict]]:
+    """读取某一历史版本的 (plants, mutations) 原始记录"""
+    for entry in load_history(history_dir):
+        if entry.version == version:
+            data = orjson.loads(
+                gzip.decompress(_version_path(history_dir, entry).read_bytes())
+            )
+            return data["plants"], data["mutations"]
+    raise KeyError(f"不存在的数据版本: {version}")
+
+
+def _record_version(
+    history_dir: Path,
+    plants: list[dict],
+    mutations: list[dict],
+    digest: str,
+    diff: DataDiff,
+) -> HistoryEntry:
+    """追加一个历史版本：紧凑 JSON 经 gzip 压缩保存"""
+    history = load_history(history_dir)
+    entry = HistoryEntry(
+        version=history[-1].version + 1 if history else 1,
+        content_hash=digest,
+        created_at=datetime.now(UTC).replace(microsecond=0),
+        diff=diff,
+    )
+    history_dir.mkdir(parents=True, exist_ok=True)
+    data = orjson.dumps({"plants": plants, "mutations": mutations})
+    # mtime 固定为 0，相同内容的压缩结果相同
+    write_if_changed(_version_path(history_dir, entry), gzip.compress(data, mtime=0))
+    history.append(entry)
+    write_if_changed(
+        history_dir / HISTORY_INDEX,
+        _encode([item.model_dump(by_alias=True, mode="json") for item in history]),
+    )
+    return entry
+
+
+def sync_game_data(
+    game_data: dict,
+    package_dir: Path,
+    history_dir: Path,
+    game_data_path: Path | None = None,
+) -> SyncResult:
+    """
+    将游戏数据增量同步到 plants.json 与 mutations.json。
+
+    逐条比较作物与突变，只在内容变化时写入文件；数据变化时在 history_dir
+    追加一个版本，并更新 data_version.json 中发布的内容哈希。
+    新出现的突变追加到 mutation_bits.json，已有突变的位序号不变。
+    """
+    plants = game_data["crops"]
+    mutations = [clean_mutation(mutation) for mutation in game_data["mutations"]]
+
+    plants_path = package_dir / "plants.json"
+    mutations_path = package_dir / "mutations.json"
+    old_plants = _read_records(plants_path)
+    old_mutations = _read_records(mutations_path)
+    diff = DataDiff(
+        plants=diff_records(old_plants, plants),
+        mutations=diff_records(old_mutations, mutations),
+    )
+
+    # 先为新突变登记位序号，与已登记的冲突时在写入任何文件之前报错
+    bits_path = package_dir / BIT_TABLE_NAME
+    try:
+        bit_table = orjson.loads(bits_path.read_bytes())
+    except FileNotFoundError:
+        bit_table = {}
+    bit_table = assign_bits(
+        bit_table,
+        ((mutation["name"], mutation.get("shareBitIndex")) for mutation in mutations),
+    )
+
+    plants_data = _encode(plants)
+    mutations_data = _encode(mutations)
+    digest = content_hash(plants_data, mutations_data).hex()
+
+    # 首次同步时先把现有数据记为第一个版本，之后的变化都可追溯
+    history = load_history(history_dir)
+    if not history and (old_plants or old_mutations):
+        old_digest = content_hash(_encode(old_plants), _encode(old_mutations)).hex()
+        history = [
+            _record_version(
+                history_dir, old_plants, old_mutations, old_digest, DataDiff()
+            )
+        ]
+    if history and history[-1].content_hash == digest:
+        entry = history[-1]
+    else:
+        entry = _record_version(history_dir, plants, mutations, digest, diff)
+
+    written = []
+    if game_data_path is not None and write_if_changed(
+        game_data_path, _encode(game_data)
+    ):
+        written.append(game_data_path)
+    for path, data in [
+        (bits_path, _encode(bit_table)),
+        (plants_path, plants_data),
+        (mutations_path, mutations_data),
+    ]:
+        if write_if_changed(path, data):
+            written.append(path)
+
+    version = DataVersion(version=entry.version, content_hash=digest)
+    version_path = package_dir / DATA_VERSION_NAME
+    if write_if_changed(
+        version_path, _encode(version.model_dump(by_alias=True, mode="json"))
+    ):
+        written.append(version_path)
+
+    return SyncResult(diff=diff, version=version, written=written)
@@ -0,0 +1,52 @@
+import random
+import timeit
+
+from fknc_calc import calc_price, load_data
+from fknc_calc.fast import (
+    calc_price_fast,
+    to_fast_mutation,
+    to_fast_plant,
+)
+
+ROUNDS = 20000
+
+
+def main():
+    plants, mutations = load_data()
+    fast_plants = list(map(to_fast_plant, plants))
+    fast_mutations = list(map(to_fast_mutation, mutations))
+
+    rng = random.Random(0)
+    cases = []
+    for _ in range(1000):
+        i = rng.randrange(len(plants))
+        chosen = rng.sample(range(len(mutations)), rng.randrange(0, 10))
+        weight = round(rng.uniform(plants[i].max_weight / 34, plants[i].max_weight), 3)
+        cases.append((i, weight, chosen))
+
+    slow_cases = [(plants[i], w, [mutations[j] for j in c]) for i, w, c in cases]
+    fast_cases = [
+        (fast_plants[i], w, [fast_mutations[j] for j in c]) for i, w, c in cases
+    ]
+
+    for (p, w, ms), (fp, fw, fms) in zip(slow_cases, fast_cases):
+        assert calc_price(p, w, ms).total_price == calc_price_fast(fp, fw, fms)[-1]
+
+    def run_slow():
+        for p, w, ms in slow_cases:
+            calc_price(p, w, ms)
+
+    def run_fast():
+        for p, w, ms in fast_cases:
+            calc_price_fast(p, w, ms)
+
+    number = ROUNDS // len(cases)
+    slow = min(timeit.repeat(run_slow, number=number, repeat=5)) / ROUNDS
+    fast = min(timeit.repeat(run_fast, number=number, repeat=5)) / ROUNDS
+    print(f"calc_price:      {slow * 1e6:8.3f} µs/次")
+    print(f"calc_price_fast: {fast * 1e6:8.3f} µs/次")
+    print(f"加速比: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import statistics
+import subprocess
+import sys
+import timeit
+
+RUNS = 20
+
+CODE = """
+import time
+
+t0 = time.perf_counter()
+from fknc_calc import load_data
+t1 = time.perf_counter()
+load_data(use_snapshot={use_snapshot})
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+
+def measure(use_snapshot: bool) -> tuple[float, float]:
+    imports, loads = [], []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", CODE.format(use_snapshot=use_snapshot)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        import_time, load_time = map(float, output.split())
+        imports.append(import_time)
+        loads.append(load_time)
+    return statistics.median(imports), statistics.median(loads)
+
+
+def main():
+    from fknc_calc import load_data
+    from fknc_calc.snapshot import build_snapshot
+
+    build_snapshot()
+
+    print(f"冷启动中位数（{RUNS} 次）")
+    for label, use_snapshot in [("JSON", False), ("快照", True)]:
+        import_time, load_time = measure(use_snapshot)
+        print(
+            f"{label}: 导入 {import_time * 1e3:.2f} ms, "
+            f"load_data {load_time * 1e3:.3f} ms"
+        )
+
+    # 同一进程内重复加载，对应每个 Streamlit 会话各自调用 load_data 的情况
+    print("进程内重复加载")
+    for label, use_snapshot in [("JSON", False), ("快照", True)]:
+        best = min(
+            timeit.repeat(
+                lambda: load_data(use_snapshot=use_snapshot), number=100, repeat=5
+            )
+        )
+        print(f"{label}: load_data {best / 100 * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
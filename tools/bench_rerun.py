@@ -0,0 +1,85 @@
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+RUNS = 20
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# AppTest 每次都整页运行，局部重跑通过只执行片段函数本身来模拟，
+# 片段外的元素以占位元素代替，会话状态沿用整页运行后的结果
+FRAGMENT = """
+from functools import partial
+
+import streamlit as st
+import ui
+
+catalog = ui.load_catalog()
+display_name = partial(
+    ui.display_name_of_mutation,
+    catalog.special_mutations,
+    catalog.mutations_by_name,
+)
+slots = {{
+    name: st.empty() for name in ["price", "distribution", "optimizer", "comparison"]
+}}
+st.session_state["page-running"] = False
+ui.{fragment}(catalog, display_name, slots)
+"""
+
+
+def timed(at: AppTest) -> float:
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+
+def full_page() -> tuple[float, AppTest]:
+    """切换一个突变词条时整页重跑的耗时"""
+    at = AppTest.from_file(str(ROOT / "ui.py"), default_timeout=60)
+    at.run()
+    times = []
+    for i in range(RUNS):
+        checkbox = at.checkbox[i % 3]
+        checkbox.set_value(not checkbox.value)
+        times.append(timed(at))
+    return statistics.median(times), at
+
+
+def fragment(name: str, page: AppTest) -> float:
+    """只重跑一个片段的耗时"""
+    at = AppTest.from_string(FRAGMENT.format(fragment=name), default_timeout=60)
+    for key in ["selected-plant", "selected-weight", "selected-base-mutation"]:
+        at.session_state[key] = page.session_state[key]
+    for key in ["distribution-tier", "distribution-giant", "optimizer-top-k"]:
+        at.session_state[key] = page.session_state[key]
+    at.session_state["optimizer-unavailable"] = []
+    at.run()
+    return statistics.median(timed(at) for _ in range(RUNS))
+
+
+def harness() -> float:
+    """AppTest 自身的固定开销，作为参照"""
+    at = AppTest.from_string("import streamlit as st", default_timeout=60)
+    return statistics.median(timed(at) for _ in range(RUNS))
+
+
+def main():
+    sys.path.insert(0, str(ROOT))
+
+    full, page = full_page()
+    print(f"重跑耗时中位数（{RUNS} 次）")
+    print(f"整页: {full * 1e3:.1f} ms")
+    print(f"突变词条片段: {fragment('mutation_grid', page) * 1e3:.1f} ms")
+    print(f"输入片段: {fragment('input_panel', page) * 1e3:.1f} ms")
+    print(f"空脚本（AppTest 开销）: {harness() * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
-import math
-from typing import List, Dict
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, NamedTuple
+
+import numpy as np
 from pydantic import BaseModel
 
 
@@ -28,68 +34,295 @@ def predict_price(p: PriceCo, k: float) -> float:
     return compute_x(p) * k
 
 
-# =========================
-# 简单平均值
-# =========================
+WEIGHT_HALF_STEP = 0.005
+"""显示的重量只保留两位小数，真实重量在 [w-0.005, w+0.005) 内"""
+PRICE_HALF_STEP = 0.5
+"""价格取整带来的误差"""
 
 
-def coefficient_mean(data_list: List[PriceCo]) -> float:
-    nums = [p.price / compute_x(p) for p in data_list]
-    return sum(sorted(nums)) / len(nums)
+def compute_x_bounds(p: PriceCo) -> tuple[float, float]:
+    """真实重量未知时 X 的取值范围"""
+    factor = p.special * p.base * (p.weather + 1.0)
+    low = max(p.weight - WEIGHT_HALF_STEP, 0.0)
+    return factor * low**1.5, factor * (p.weight + WEIGHT_HALF_STEP) ** 1.5
 
 
 # =========================
-# 最小化 Σ(kX - price)^2
+# 估计方法
+#
+# 所有作物的样本拼接为一维数组，以 group 标记所属作物，
+# 按作物分组的求和统一用 np.bincount 完成，一次计算全部作物
 # =========================
 
+ESTIMATORS = ("平均取值", "最小二乘", "log 回归", "Huber", "重量区间")
 
-def coefficient_least_squares(data_list: List[PriceCo]) -> float:
-    xs = [compute_x(p) for p in data_list]
-    numerator = sum(x * p.price for x, p in zip(xs, data_list))
-    denominator = sum(x * x for x in xs)
+HUBER_C = 1.345
+"""Huber 损失的阈值，以残差的稳健尺度为单位"""
+HUBER_ITERATIONS = 50
+INTERVAL_ITERATIONS = 100
 
-    if denominator == 0:
-        raise ValueError("Denominator is zero")
 
-    return numerator / denominator
+def group_sum(group: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    return np.bincount(group, weights=values, minlength=n_groups)
 
 
-# =========================
-# log(price) = log(k) + log(X)
-# =========================
+def group_median(group: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """各组的中位数，要求每组至少一个样本"""
+    order = np.lexsort((values, group))
+    ordered = values[order]
+    counts = np.bincount(group, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    return (ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]) / 2
 
 
-def coefficient_log_regression(data_list: List[PriceCo]) -> float:
-    logs = []
+def _group_starts(group: np.ndarray, n_groups: int) -> np.ndarray:
+    counts = np.bincount(group, minlength=n_groups)
+    return np.cumsum(counts) - counts
 
-    for p in data_list:
-        x = compute_x(p)
 
-        if p.price <= 0 or x <= 0:
-            raise ValueError("Log regression requires positive values")
+def group_max(group: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """各组的最大值，要求样本已按 group 排序且每组至少一个样本"""
+    return np.maximum.reduceat(values, _group_starts(group, n_groups))
 
-        logs.append(math.log(p.price) - math.log(x))
 
-    log_k = sum(logs) / len(logs)
-    return math.exp(log_k)
+def group_min(group: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """各组的最小值，要求同 `group_max`"""
+    return np.minimum.reduceat(values, _group_starts(group, n_groups))
 
 
-# =========================
-# 误差评估
-# =========================
+def coefficient_mean(group, x, price, n_groups) -> np.ndarray:
+    counts = np.bincount(group, minlength=n_groups)
+    return group_sum(group, price / x, n_groups) / counts
+
+
+def coefficient_least_squares(group, x, price, n_groups) -> np.ndarray:
+    """最小化 Σ(kX - price)^2"""
+    return group_sum(group, x * price, n_groups) / group_sum(group, x * x, n_groups)
+
+
+def coefficient_log_regression(group, x, price, n_groups) -> np.ndarray:
+    """log(price) = log(k) + log(X)"""
+    if np.any(price <= 0) or np.any(x <= 0):
+        raise ValueError("Log regression requires positive values")
+    counts = np.bincount(group, minlength=n_groups)
+    return np.exp(group_sum(group, np.log(price / x), n_groups) / counts)
+
+
+def huber_scale(group, x, price, n_groups) -> np.ndarray:
+    """残差的稳健尺度：以 log 回归结果为起点，各组 |r| 中位数的 1.4826 倍"""
+    k = coefficient_log_regression(group, x, price, n_groups)
+    residual = np.abs(k[group] * x / price - 1)
+    return 1.4826 * group_median(group, residual, n_groups)
+
+
+def coefficient_huber(
+    group,
+    x,
+    price,
+    n_groups,
+    scale: np.ndarray | None = None,
+    start: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    以相对误差 r = kX/price - 1 为残差的 Huber 估计。
+
+    求解 Σ ψ(r)·X/price = 0，ψ 将 r 截断到 ±c·scale。目标函数分段二次，
+    以牛顿法迭代通常几步即精确收敛；某组全部样本都被截断时，
+    该组退回迭代重加权最小二乘的一步。尺度在迭代中保持不变，只需求一次中位数。
+    """
+    if scale is None:
+        scale = huber_scale(group, x, price, n_groups)
+    a = x / price
+    k = (
+        coefficient_log_regression(group, x, price, n_groups)
+        if start is None
+        else start
+    )
+    # 尺度为 0（样本完全吻合）时不截断
+    threshold = np.where(scale > 0, HUBER_C * scale, np.inf)[group]
+    for _ in range(HUBER_ITERATIONS):
+        residual = k[group] * a - 1
+        inside = np.abs(residual) <= threshold
+        gradient = group_sum(
+            group, np.clip(residual, -threshold, threshold) * a, n_groups
+        )
+        curvature = group_sum(group, np.where(inside, a * a, 0.0), n_groups)
+
+        # 全部被截断的组：以 c·scale/|r| 为权重的加权最小二乘
+        stuck = curvature == 0
+        if np.any(stuck):
+            weight = threshold / np.maximum(np.abs(residual), 1e-300)
+            weighted = weight * a
+            fallback = group_sum(group, weighted, n_groups) / group_sum(
+                group, weighted * a, n_groups
+            )
+        else:
+            fallback = k
+        updated = np.where(
+            stuck, fallback, k - gradient / np.where(stuck, 1.0, curvature)
+        )
+        converged = np.allclose(updated, k, rtol=1e-12, atol=0)
+        k = updated
+        if converged:
+            break
+    return k
+
+
+class IntervalFit(NamedTuple):
+    k: np.ndarray
+    """有可行区间时取其几何中点，否则取偏离最小的解"""
+    low: np.ndarray
+    high: np.ndarray
+    """k 的可行区间；样本互相矛盾时上下限都等于 k"""
+    conflicts: np.ndarray
+    """在解 k 下无法由区间内的重量解释的样本数"""
+
+
+def interval_fit(group, x_low, x_high, price, n_groups) -> IntervalFit:
+    """
+    将真实重量视为区间内的未知量，与 k 联合拟合。
 
+    在 t = log k 与各样本的 log 重量上最小化 Σ(t + log X_i - log price_i)²，
+    重量限制在区间内。给定 t 时最优的重量就是把隐含重量投影回区间，
+    问题化为 t 的一维凸分段二次函数 Σ d(t, [L_i, U_i])²，
+    以带区间保护的牛顿法求解。样本的区间有公共部分时目标为 0，
+    公共部分即为 k 的可行区间。样本须已按 group 排序。
+    """
+    with np.errstate(divide="ignore"):
+        lower = np.log((price - PRICE_HALF_STEP) / x_high)
+        upper = np.log((price + PRICE_HALF_STEP) / x_low)
+    feasible_low = group_max(group, lower, n_groups)
+    feasible_high = group_min(group, upper, n_groups)
+
+    # 无公共部分时解必在 [min U, max L] 之间，导数在两端异号
+    bracket_low = np.minimum(feasible_low, feasible_high)
+    bracket_high = np.maximum(feasible_low, feasible_high)
+    t = (bracket_low + bracket_high) / 2
+    for _ in range(INTERVAL_ITERATIONS):
+        at = t[group]
+        gap = at - np.clip(at, lower, upper)
+        gradient = group_sum(group, gap, n_groups)
+        curvature = group_sum(group, (gap != 0).astype(np.float64), n_groups)
+        bracket_low = np.where(gradient < 0, t, bracket_low)
+        bracket_high = np.where(gradient > 0, t, bracket_high)
+
+        newton = t - gradient / np.maximum(curvature, 1)
+        inside = (newton > bracket_low) & (newton < bracket_high)
+        updated = np.where(
+            gradient == 0,
+            t,
+            np.where(inside, newton, (bracket_low + bracket_high) / 2),
+        )
+        converged = np.allclose(updated, t, rtol=1e-15, atol=0)
+        t = updated
+        if converged:
+            break
+
+    feasible = feasible_low <= feasible_high
+    at = t[group]
+    outside = (at < lower - 1e-12) | (at > upper + 1e-12)
+    return IntervalFit(
+        k=np.exp(np.where(feasible, (feasible_low + feasible_high) / 2, t)),
+        low=np.exp(np.where(feasible, feasible_low, t)),
+        high=np.exp(np.where(feasible, feasible_high, t)),
+        conflicts=np.bincount(group, weights=outside, minlength=n_groups).astype(
+            np.intp
+        ),
+    )
+
+
+def coefficient_interval(group, x_low, x_high, price, n_groups) -> np.ndarray:
+    return interval_fit(group, x_low, x_high, price, n_groups).k
+
+
+def fit_all(
+    group,
+    x,
+    price,
+    n_groups,
+    x_low,
+    x_high,
+    scale: np.ndarray | None = None,
+    start: np.ndarray | None = None,
+) -> np.ndarray:
+    """各估计方法的结果，形状为 (估计方法, 作物)"""
+    return np.stack(
+        [
+            coefficient_mean(group, x, price, n_groups),
+            coefficient_least_squares(group, x, price, n_groups),
+            coefficient_log_regression(group, x, price, n_groups),
+            coefficient_huber(group, x, price, n_groups, scale, start),
+            coefficient_interval(group, x_low, x_high, price, n_groups),
+        ]
+    )
+
+
+# 每批重抽样的样本总数上限，控制内存占用
+_BOOTSTRAP_BATCH = 1 << 21
+
+
+def bootstrap(
+    group: np.ndarray,
+    x: np.ndarray,
+    price: np.ndarray,
+    n_groups: int,
+    x_low: np.ndarray,
+    x_high: np.ndarray,
+    rounds: int,
+    rng: np.random.Generator,
+    confidence: float = 0.95,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    各估计方法的 bootstrap 置信区间 (下限, 上限)，形状均为 (估计方法, 作物)。
+
+    每轮在各作物内部有放回地重抽样，多轮合并为 轮次×作物 个组一次拟合。
+    Huber 估计沿用全部样本的残差尺度，并以全部样本的结果为迭代起点。
+    样本须已按 group 排序。
+    """
+    if rounds <= 0:
+        nan = np.full((len(ESTIMATORS), n_groups), np.nan)
+        return nan, nan
+
+    counts = np.bincount(group, minlength=n_groups)
+    starts = _group_starts(group, n_groups)
+    scale = huber_scale(group, x, price, n_groups)
+    start = coefficient_huber(group, x, price, n_groups, scale)
+    batch = max(1, min(rounds, _BOOTSTRAP_BATCH // len(group)))
+
+    estimates = []
+    for done in range(0, rounds, batch):
+        size = min(batch, rounds - done)
+        rep_group = np.tile(group, size)
+        picked = starts[rep_group] + (
+            rng.random(rep_group.shape[0]) * counts[rep_group]
+        ).astype(np.intp)
+        combined = np.repeat(np.arange(size) * n_groups, len(group)) + rep_group
+        fitted = fit_all(
+            combined,
+            x[picked],
+            price[picked],
+            size * n_groups,
+            x_low[picked],
+            x_high[picked],
+            np.tile(scale, size),
+            np.tile(start, size),
+        )
+        estimates.append(fitted.reshape(len(ESTIMATORS), size, n_groups))
+
+    estimates = np.concatenate(estimates, axis=1)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(estimates, [tail, 100 - tail], axis=1)
+    return low, high
 
-def evaluate(data_list: List[PriceCo], k: float) -> Dict[str, float]:
-    rel_sq_error = 0.0
 
-    for p in data_list:
-        predicted = predict_price(p, k)
+# =========================
+# 误差评估
+# =========================
 
-        rel_sq_error += ((predicted - p.price) / p.price) ** 2
 
-    return {
-        "相对平方误差": rel_sq_error,
-    }
+def relative_errors(group, x, price, k: np.ndarray) -> np.ndarray:
+    """各样本在各估计方法下的相对误差，形状为 (估计方法, 样本)"""
+    return (k[:, group] * x - price) / price
 
 
 # =========================
@@ -235,37 +468,300 @@ coefficient_map: Dict[str, List[PriceCo]] = {
 # =========================
 
 
-def run_analysis(name: str, data_list: List[PriceCo]) -> None:
-    print(f"\n===== {name} =====")
-
-    k_mean = coefficient_mean(data_list)
-    k_ls = coefficient_least_squares(data_list)
-    k_log = coefficient_log_regression(data_list)
+class Samples(NamedTuple):
+    """一组作物的样本，按作物顺序拼接"""
+
+    names: list[str]
+    group: np.ndarray
+    x: np.ndarray
+    price: np.ndarray
+    x_low: np.ndarray
+    x_high: np.ndarray
+    """真实重量取区间两端时的 X"""
+
+
+class FitResult(NamedTuple):
+    names: list[str]
+    counts: np.ndarray
+    k: np.ndarray
+    """形状为 (估计方法, 作物)，下同"""
+    low: np.ndarray
+    high: np.ndarray
+    rms: np.ndarray
+    """相对误差的均方根"""
+    worst: np.ndarray
+    """相对误差绝对值的最大值"""
+    feasible_low: np.ndarray
+    feasible_high: np.ndarray
+    """按重量区间拟合得到的 k 的范围，形状为 (作物,)，下同"""
+    conflicts: np.ndarray
+
+
+def to_samples(data: Dict[str, List[PriceCo]]) -> Samples:
+    names = list(data)
+    rows = [
+        (i, compute_x(p), p.price, *compute_x_bounds(p))
+        for i, name in enumerate(names)
+        for p in data[name]
+    ]
+    group, x, price, x_low, x_high = (np.array(column) for column in zip(*rows))
+    return Samples(
+        names, group.astype(np.intp), x, price.astype(np.float64), x_low, x_high
+    )
+
+
+def load_store(path: Path) -> Dict[str, List[PriceCo]]:
+    from observations import ObservationStore
+
+    with ObservationStore(path) as store:
+        return {
+            crop: [PriceCo(**observation._asdict()) for observation in observations]
+            for crop, observations in store.observations().items()
+        }
+
+
+def synthetic_samples(per_crop: int, seed: int) -> tuple[Samples, np.ndarray]:
+    """
+    按目录中的作物与突变生成模拟样本，返回 (样本, 真实系数)。
 
-    print(f"最小二乘 k: \t{k_ls:.6f}")
-    print(f"log 回归 k: \t{k_log:.6f}")
-    print(f"平均取值 k: \t{k_mean:.6f}")
+    与游戏内一样，价格按真实重量计算，记录的重量只保留两位小数。
+    """
+    from fknc_calc import BASE_MUTATIONS, load_data
+
+    plants, mutations = load_data()
+    rng = np.random.default_rng(seed)
+    bases = np.array(
+        [1.0] + [m.multiplier for m in mutations if m.name in BASE_MUTATIONS]
+    )
+    regular = np.array(
+        [m.multiplier for m in mutations if m.name not in BASE_MUTATIONS]
+    )
+
+    n = len(plants) * per_crop
+    group = np.repeat(np.arange(len(plants)), per_crop)
+    max_weight = np.array([plant.max_weight for plant in plants])[group]
+    weight = rng.uniform(max_weight / 34, max_weight)
+    base = rng.choice(bases, n)
+    chosen = rng.random((n, len(regular))) < 3 / len(regular)
+    weather = chosen.astype(np.float64) @ regular
+
+    truth = np.array([round(plant.price_coefficient, 4) for plant in plants])
+    price = np.round(truth[group] * base * weight**1.5 * (weather + 1))
+    factor = base * (weather + 1)
+    shown = np.round(weight, 2)
+    samples = Samples(
+        [plant.name for plant in plants],
+        group,
+        factor * shown**1.5,
+        price,
+        factor * np.maximum(shown - WEIGHT_HALF_STEP, 0) ** 1.5,
+        factor * (shown + WEIGHT_HALF_STEP) ** 1.5,
+    )
+    return samples, truth
+
+
+def fit_chunk(samples: Samples, rounds: int, seed: np.random.SeedSequence) -> FitResult:
+    """拟合一组作物，在子进程中执行"""
+    group, x, price = samples.group, samples.x, samples.price
+    x_low, x_high = samples.x_low, samples.x_high
+    n_groups = len(samples.names)
+    k = fit_all(group, x, price, n_groups, x_low, x_high)
+    low, high = bootstrap(
+        group,
+        x,
+        price,
+        n_groups,
+        x_low,
+        x_high,
+        rounds,
+        np.random.default_rng(seed),
+    )
+    interval = interval_fit(group, x_low, x_high, price, n_groups)
+
+    errors = relative_errors(group, x, price, k)
+    counts = np.bincount(group, minlength=n_groups)
+    rms = np.sqrt(
+        np.stack([group_sum(group, e * e, n_groups) for e in errors]) / counts
+    )
+    worst = np.zeros_like(k)
+    for i, e in enumerate(errors):
+        np.maximum.at(worst[i], group, np.abs(e))
+    return FitResult(
+        samples.names,
+        counts,
+        k,
+        low,
+        high,
+        rms,
+        worst,
+        interval.low,
+        interval.high,
+        interval.conflicts,
+    )
+
+
+def split(samples: Samples, chunk_size: int) -> list[Samples]:
+    """按作物分块，每块内的 group 重新从 0 编号"""
+    bounds = np.searchsorted(samples.group, np.arange(len(samples.names) + 1))
+    chunks = []
+    for first in range(0, len(samples.names), chunk_size):
+        last = min(first + chunk_size, len(samples.names))
+        rows = slice(bounds[first], bounds[last])
+        chunks.append(
+            Samples(
+                samples.names[first:last],
+                samples.group[rows] - first,
+                *(getattr(samples, field)[rows] for field in Samples._fields[2:]),
+            )
+        )
+    return chunks
 
-    print("\n--- 误差分析 ---")
 
-    for method_name, k in [
-        ("最小二乘", k_ls),
-        ("log 回归", k_log),
-        ("平均取值", k_mean),
-    ]:
-        err = evaluate(data_list, k)
-        print(f"\n[{method_name}]")
-        print(f"相对平方误差和(%): {err['相对平方误差'] * 10000:.6f}")
+def fit_samples(
+    samples: Samples,
+    rounds: int = 1000,
+    workers: int = 1,
+    chunk_size: int = 8,
+    seed: int = 0,
+) -> FitResult:
+    """
+    分块拟合全部作物。
 
-        print("各样本差额:")
-        for p in data_list:
-            predicted = predict_price(p, k)
-            diff = (predicted - p.price) / p.price
-            print(
-                f"  weight={p.weight:.2f}, expected {p.price}, got {predicted:.0f} ({diff * 100:+.2f}%)"
-            )
+    随机数按块划分，结果与进程数无关。
+    """
+    order = np.argsort(samples.group, kind="stable")
+    samples = Samples(
+        samples.names,
+        *(getattr(samples, field)[order] for field in Samples._fields[1:]),
+    )
+    chunks = split(samples, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = (chunks, [rounds] * len(chunks), seeds)
+    if workers <= 1:
+        results = list(map(fit_chunk, *args))
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(fit_chunk, *args))
+
+    return FitResult(
+        [name for result in results for name in result.names],
+        *(
+            np.concatenate([getattr(result, field) for result in results], axis=-1)
+            for field in FitResult._fields[1:]
+        ),
+    )
+
+
+def print_table(result: FitResult, truth: np.ndarray | None = None):
+    header = ["作物", "样本", "方法", "k", "95% 区间", "RMS误差%", "最大误差%"]
+    if truth is not None:
+        header.append("偏离真值%")
+    print("\t".join(header))
+    for j, name in enumerate(result.names):
+        best = np.argmin(result.rms[:, j])
+        for i, method in enumerate(ESTIMATORS):
+            row = [
+                name if i == 0 else "",
+                str(result.counts[j]) if i == 0 else "",
+                method + (" *" if i == best else ""),
+                f"{result.k[i, j]:.6f}",
+                f"[{result.low[i, j]:.6f}, {result.high[i, j]:.6f}]",
+                f"{result.rms[i, j] * 100:.4f}",
+                f"{result.worst[i, j] * 100:.4f}",
+            ]
+            if truth is not None:
+                row.append(f"{(result.k[i, j] / truth[j] - 1) * 100:+.4f}")
+            print("\t".join(row))
+
+    print(f"\n按重量区间 [w-{WEIGHT_HALF_STEP}, w+{WEIGHT_HALF_STEP}) 拟合")
+    header = ["作物", "样本", "k 的范围", "宽度%", "矛盾样本"]
+    if truth is not None:
+        header.append("含真值")
+    print("\t".join(header))
+    for j, name in enumerate(result.names):
+        low, high = result.feasible_low[j], result.feasible_high[j]
+        row = [
+            name,
+            str(result.counts[j]),
+            f"[{low:.6f}, {high:.6f}]",
+            f"{(high / low - 1) * 100:.4f}",
+            str(result.conflicts[j]),
+        ]
+        if truth is not None:
+            row.append("是" if low <= truth[j] <= high else "否")
+        print("\t".join(row))
+
+
+def fitted_weight(p: PriceCo, k: float) -> float:
+    """系数为 k 时与价格最吻合、且在显示精度内的真实重量"""
+    factor = p.special * p.base * (p.weather + 1.0)
+    implied = (p.price / (k * factor)) ** (2 / 3)
+    return min(max(implied, p.weight - WEIGHT_HALF_STEP), p.weight + WEIGHT_HALF_STEP)
+
+
+def print_details(data: Dict[str, List[PriceCo]], result: FitResult):
+    for j, name in enumerate(result.names):
+        print(f"\n===== {name} =====")
+        for i, method in enumerate(ESTIMATORS):
+            k = result.k[i, j]
+            print(f"\n[{method}] k = {k:.6f}")
+            print("各样本差额:")
+            for p in data[name]:
+                predicted = predict_price(p, k)
+                diff = (predicted - p.price) / p.price
+                line = f"  weight={p.weight:.2f}, expected {p.price}, got {predicted:.0f} ({diff * 100:+.2f}%)"
+                if method == "重量区间":
+                    line += f", 估计重量 {fitted_weight(p, k):.5f}"
+                print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="拟合作物价格系数")
+    parser.add_argument(
+        "--bootstrap", type=int, default=1000, help="bootstrap 重抽样轮数，0 为不计算"
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=os.cpu_count(), help="进程数"
+    )
+    parser.add_argument("--chunk-size", type=int, default=8, help="每块的作物数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        metavar="N",
+        help="不使用 coefficient_map，按目录中的全部作物各生成 N 个模拟样本",
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        help="不使用 coefficient_map，读取 observations.py 的样本库",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="打印各样本差额")
+    args = parser.parse_args()
+
+    truth = None
+    data = coefficient_map
+    if args.synthetic:
+        samples, truth = synthetic_samples(args.synthetic, args.seed)
+    else:
+        if args.db is not None:
+            data = load_store(args.db)
+        samples = to_samples(data)
+
+    start = time.perf_counter()
+    result = fit_samples(
+        samples, args.bootstrap, args.workers, args.chunk_size, args.seed
+    )
+    elapsed = time.perf_counter() - start
+
+    print_table(result, truth)
+    if args.verbose and not args.synthetic:
+        print_details(data, result)
+    print(
+        f"\n{len(result.names)} 种作物，{len(samples.price)} 个样本，"
+        f"bootstrap {args.bootstrap} 轮，用时 {elapsed:.2f} 秒"
+    )
 
 
 if __name__ == "__main__":
-    for crop, data_list in coefficient_map.items():
-        run_analysis(crop, data_list)
+    main()
@@ -1,14 +1,47 @@
 # -*- coding: utf-8 -*-
 
+import argparse
 import asyncio
-import json
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from playwright.async_api import async_playwright, Page
+import orjson
+
+from fknc_calc.images import store_images
+from fknc_calc.sync import find_game_data, load_game_data, sync_game_data
+
+# Playwright 仅在浏览器模式下需要，离线导入时不必安装
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+PACKAGE_DIR = Path("src/fknc_calc")
+HISTORY_DIR = Path("history")
+"""数据历史版本的保存位置"""
 
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/148.0.0.0 Safari/537.36"
 
 
-async def scrape(page: Page):
+async def download_images(page: "Page", plants: list[dict]) -> dict[str, bytes]:
+    """下载作物图片，失败的图片跳过，保留已有的缓存"""
+
+    async def download(image_url: str) -> tuple[str, bytes | None]:
+        try:
+            response = await page.request.get(f"https://www.fknc.top{image_url}")
+        except Exception as e:
+            print(f"图片下载失败: {image_url} {e}")
+            return image_url, None
+        if not response.ok:
+            print(f"图片下载失败: {image_url} {response.status}")
+            return image_url, None
+        return image_url, await response.body()
+
+    image_urls = sorted({plant["imageUrl"] for plant in plants})
+    results = await asyncio.gather(*map(download, image_urls))
+    return {image_url: data for image_url, data in results if data is not None}
+
+
+async def scrape(page: "Page") -> dict:
+    """登录网页，从 localStorage 中读取游戏数据"""
     email_login = page.locator("div.login-tab-row > div.login-tab:nth-child(2)")
     email = page.locator("input[type=email]")
     password = page.locator("input[type=password]")
@@ -30,59 +63,72 @@ async def scrape(page: Page):
     while fknc_data is None:
         await asyncio.sleep(0.1)
 
-        state = await page.context.storage_state()
-        fknc_localStorage = state["origins"][0]["localStorage"]
-        for entry in fknc_localStorage:
-            if entry["name"] == "fknc_game_data":
-                fknc_data = json.loads(entry["value"])
-                break
-
-    plants = fknc_data["crops"]
-    mutations = fknc_data["mutations"]
-
-    with open("game_data.json", "w", encoding="utf-8") as f:
-        json.dump(
-            fknc_data,
-            f,
-            ensure_ascii=False,
-            indent=2,
-        )
-
-    with open("src/fknc_calc/plants.json", "w", encoding="utf-8") as f:
-        json.dump(
-            plants,
-            f,
-            ensure_ascii=False,
-            indent=2,
-        )
-    with open("src/fknc_calc/mutations.json", "w", encoding="utf-8") as f:
-
-        def clean_mut(mut: dict) -> dict:
-            mut.pop("sortOrder")
-            mut.pop("isActive")
-            mut.pop("shareBitIndex")
-            return mut
-
-        json.dump(
-            [clean_mut(mut) for mut in mutations],
-            f,
-            ensure_ascii=False,
-            indent=2,
-        )
-
-
-async def main():
+        # 与离线导入相同，从 storage_state 中查找 localStorage 里的游戏数据
+        fknc_data = find_game_data(await page.context.storage_state())
+
+    return fknc_data
+
+
+def ingest(fknc_data: dict) -> list[dict]:
+    """增量同步游戏数据，返回需要下载图片的作物"""
+    result = sync_game_data(
+        fknc_data, PACKAGE_DIR, HISTORY_DIR, game_data_path=Path("game_data.json")
+    )
+    print(f"作物: {result.diff.plants.summary()}")
+    print(f"突变: {result.diff.mutations.summary()}")
+    for path in result.written:
+        print(f"已更新: {path}")
+    print(f"数据版本: v{result.version.version} {result.version.content_hash[:12]}")
+
+    # 只下载新增、变化或尚未缓存的作物图片
+    manifest_path = PACKAGE_DIR / "images" / "manifest.json"
+    cached = orjson.loads(manifest_path.read_bytes()) if manifest_path.exists() else {}
+    updated = set(result.diff.plants.added) | set(result.diff.plants.changed)
+    return [
+        plant
+        for plant in fknc_data["crops"]
+        if plant["imageUrl"] not in cached or plant["name"] in updated
+    ]
+
+
+async def extract_with_browser(headed: bool):
+    from playwright.async_api import async_playwright
+
     async with async_playwright() as pw:
         async with await pw.chromium.launch(
             channel="chrome",
-            headless=False,
+            headless=not headed,
         ) as browser:
             async with await browser.new_context(
                 user_agent=USER_AGENT,
             ) as ctx:
                 async with await ctx.new_page() as page:
-                    await scrape(page)
+                    plants = ingest(await scrape(page))
+                    if plants:
+                        images = await download_images(page, plants)
+                        store_images(images, PACKAGE_DIR / "images")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="提取游戏数据")
+    parser.add_argument(
+        "source",
+        nargs="?",
+        type=Path,
+        help="离线导入：game_data.json、localStorage 导出或 HAR 文件；"
+        "不指定时启动浏览器登录网页提取",
+    )
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    args = parser.parse_args()
+
+    if args.source is None:
+        asyncio.run(extract_with_browser(args.headed))
+        return
+
+    plants = ingest(load_game_data(args.source))
+    if plants:
+        print(f"离线导入不下载图片，{len(plants)} 种作物的图片待浏览器模式更新")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
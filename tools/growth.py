@@ -0,0 +1,330 @@
+import argparse
+import csv
+import math
+import sqlite3
+import statistics
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+import orjson
+
+from observations import DEFAULT_DB, load_plants, unknown_crops, write_plants
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS growth_observations (
+    id INTEGER PRIMARY KEY,
+    crop TEXT NOT NULL,
+    seconds_per_percent REAL NOT NULL,
+    final_weight REAL NOT NULL,
+    rejected INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS growth_observations_crop ON growth_observations (crop);
+
+-- 各作物已接受样本的数量、均值与离差平方和 (Welford)
+CREATE TABLE IF NOT EXISTS growth_stats (
+    crop TEXT PRIMARY KEY,
+    n INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL
+);
+"""
+
+FIELDS = ("crop", "seconds_per_percent", "final_weight")
+
+OUTLIER_SIGMA = 3.0
+"""偏离中位数超过该倍数稳健标准差的样本视为离群"""
+OUTLIER_MIN_SAMPLES = 3
+"""样本达到该数量后才剔除离群样本"""
+MIN_RELATIVE_SPREAD = 0.01
+"""稳健标准差的下限，相对中位数；逐帧计时本身约有 1% 的误差，避免样本过于一致时误剔除"""
+MAD_SCALE = 1.4826
+"""正态分布下 中位数绝对偏差 * MAD_SCALE ≈ 标准差"""
+
+
+class GrowthObservation(NamedTuple):
+    crop: str
+    seconds_per_percent: float
+    """生长 1% 所需的秒数"""
+    final_weight: float
+    """长成时的重量 kg"""
+
+    @property
+    def speed(self) -> float:
+        """生长速度 = 每百分比所需时间 * 100 / 最终重量"""
+        if self.seconds_per_percent <= 0 or self.final_weight <= 0:
+            raise ValueError(f"时间与重量须为正数: {self}")
+        return self.seconds_per_percent * 100 / self.final_weight
+
+
+class GrowthStats(NamedTuple):
+    """一个作物已接受样本的生长速度统计"""
+
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    """Σ(速度 - 均值)^2"""
+
+    @property
+    def std(self) -> float:
+        if self.n < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.n - 1))
+
+    def update(self, speed: float) -> "GrowthStats":
+        """即 (数据*n + 新数据) / (n+1)，同时累计离差平方和"""
+        n = self.n + 1
+        delta = speed - self.mean
+        mean = self.mean + delta / n
+        return GrowthStats(n, mean, self.m2 + delta * (speed - mean))
+
+
+def outliers(speeds: list[float]) -> list[bool]:
+    """
+    按中位数与中位数绝对偏差 (MAD) 判断每个样本是否离群。
+
+    只看整组样本，与记录顺序无关；离群样本本身几乎不影响中位数与 MAD。
+    """
+    if len(speeds) < OUTLIER_MIN_SAMPLES:
+        return [False] * len(speeds)
+    median = statistics.median(speeds)
+    mad = statistics.median(abs(speed - median) for speed in speeds)
+    spread = max(mad * MAD_SCALE, median * MIN_RELATIVE_SPREAD)
+    return [abs(speed - median) > OUTLIER_SIGMA * spread for speed in speeds]
+
+
+class GrowthStore:
+    """SQLite 中的生长计时样本，以及随之增量维护的各作物生长速度"""
+
+    def __init__(self, path: Path | str = DEFAULT_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> "GrowthStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _save(self, crop: str, stats: GrowthStats):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO growth_stats VALUES (?, ?, ?, ?)",
+            (crop, *stats),
+        )
+
+    def add_many(
+        self, observations: Iterable[GrowthObservation]
+    ) -> list[tuple[GrowthObservation, bool]]:
+        """
+        记录样本并重新筛选涉及的作物，返回 (样本, 是否被剔除)。
+
+        离群样本照常保存，但不计入统计；新样本也可能让此前的样本被剔除或重新计入。
+        """
+        ids = []
+        with self.conn:
+            for observation in observations:
+                cursor = self.conn.execute(
+                    f"INSERT INTO growth_observations ({', '.join(FIELDS)}) "
+                    "VALUES (?, ?, ?)",
+                    observation,
+                )
+                ids.append((cursor.lastrowid, observation))
+            for crop in dict.fromkeys(o.crop for _, o in ids):
+                self._replay(crop)
+        return [
+            (
+                observation,
+                bool(
+                    self.conn.execute(
+                        "SELECT rejected FROM growth_observations WHERE id = ?",
+                        (id_,),
+                    ).fetchone()[0]
+                ),
+            )
+            for id_, observation in ids
+        ]
+
+    def stats(self, crop: str) -> GrowthStats:
+        row = self.conn.execute(
+            "SELECT n, mean, m2 FROM growth_stats WHERE crop = ?", (crop,)
+        ).fetchone()
+        return GrowthStats() if row is None else GrowthStats(*row)
+
+    def all_stats(self) -> dict[str, GrowthStats]:
+        rows = self.conn.execute(
+            "SELECT crop, n, mean, m2 FROM growth_stats ORDER BY crop"
+        )
+        return {crop: GrowthStats(*values) for crop, *values in rows}
+
+    def rejected(self) -> list[tuple[int, GrowthObservation]]:
+        rows = self.conn.execute(
+            f"SELECT id, {', '.join(FIELDS)} FROM growth_observations "
+            "WHERE rejected ORDER BY crop, id"
+        )
+        return [(id_, GrowthObservation(*values)) for id_, *values in rows]
+
+    def remove(self, observation_id: int) -> bool:
+        """删除一个样本，并重新筛选该作物的样本与统计"""
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT crop FROM growth_observations WHERE id = ?",
+                (observation_id,),
+            ).fetchone()
+            if row is None:
+                return False
+            self.conn.execute(
+                "DELETE FROM growth_observations WHERE id = ?", (observation_id,)
+            )
+            self._replay(row[0])
+        return True
+
+    def _replay(self, crop: str):
+        # 剔除与否取决于整组样本，任何增删后都需对该作物全部样本重新判断
+        stats = GrowthStats()
+        rows = self.conn.execute(
+            f"SELECT id, {', '.join(FIELDS)} FROM growth_observations "
+            "WHERE crop = ? ORDER BY id",
+            (crop,),
+        ).fetchall()
+        speeds = [GrowthObservation(*values).speed for _, *values in rows]
+        for (id_, *_), speed, rejected in zip(rows, speeds, outliers(speeds)):
+            if not rejected:
+                stats = stats.update(speed)
+            self.conn.execute(
+                "UPDATE growth_observations SET rejected = ? WHERE id = ?",
+                (rejected, id_),
+            )
+        if stats.n:
+            self._save(crop, stats)
+        else:
+            self.conn.execute("DELETE FROM growth_stats WHERE crop = ?", (crop,))
+
+    def rebuild_stats(self):
+        """重新筛选全部作物的样本并计算统计"""
+        with self.conn:
+            self.conn.execute("DELETE FROM growth_stats")
+            crops = self.conn.execute(
+                "SELECT DISTINCT crop FROM growth_observations"
+            ).fetchall()
+            for (crop,) in crops:
+                self._replay(crop)
+
+
+def read_observations(path: Path) -> list[GrowthObservation]:
+    """读取 CSV（带表头）或 JSONL，字段同 `GrowthObservation`"""
+    if path.suffix.lower() == ".csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            records = list(csv.DictReader(f))
+    else:
+        with open(path, "rb") as f:
+            records = [orjson.loads(line) for line in f if line.strip()]
+    return [
+        GrowthObservation(
+            record["crop"],
+            float(record["seconds_per_percent"]),
+            float(record["final_weight"]),
+        )
+        for record in records
+    ]
+
+
+def print_stats(stats: dict[str, GrowthStats]):
+    current = {plant["name"]: plant["growthSpeed"] for plant in load_plants()}
+    print("作物\t样本\t生长速度\t标准差%\t当前\t差异%")
+    for crop, s in stats.items():
+        old = current.get(crop)
+        diff = f"{(s.mean / old - 1) * 100:+.4f}" if old else "-"
+        spread = s.std / s.mean * 100
+        print(f"{crop}\t{s.n}\t{s.mean:.4f}\t{spread:.4f}\t{old or '未知'}\t{diff}")
+
+
+def print_results(results: list[tuple[GrowthObservation, bool]]):
+    for observation, rejected in results:
+        if rejected:
+            print(f"离群样本未计入: {observation.crop} {observation.speed:.4f}")
+
+
+def export(stats: dict[str, GrowthStats], min_samples: int) -> list[str]:
+    """将生长速度一次性写回 plants.json，返回更新的作物"""
+    plants = load_plants()
+    updated = []
+    for plant in plants:
+        s = stats.get(plant["name"])
+        if s is None or s.n < min_samples:
+            continue
+        speed = round(s.mean, 4)
+        if speed != plant["growthSpeed"]:
+            plant["growthSpeed"] = speed
+            updated.append(plant["name"])
+    if updated:
+        write_plants(plants)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生长计时样本库与生长速度估计")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help="样本库路径")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="批量导入 CSV / JSONL 样本")
+    importer.add_argument("files", nargs="+", type=Path)
+
+    adder = commands.add_parser("add", help="记录一个样本并输出更新后的生长速度")
+    adder.add_argument("crop")
+    adder.add_argument("seconds_per_percent", type=float, help="生长 1%% 所需的秒数")
+    adder.add_argument("final_weight", type=float, help="长成时的重量 kg")
+
+    remover = commands.add_parser("remove", help="按编号删除样本")
+    remover.add_argument("id", type=int)
+
+    commands.add_parser("stats", help="各作物的生长速度")
+    commands.add_parser("rejected", help="被剔除的离群样本")
+    commands.add_parser("rebuild", help="从样本重新计算统计")
+
+    exporter = commands.add_parser("export", help="将生长速度写回 plants.json")
+    exporter.add_argument("--min-samples", type=int, default=1)
+
+    args = parser.parse_args()
+    with GrowthStore(args.db) as store:
+        match args.command:
+            case "import" | "add":
+                if args.command == "import":
+                    observations = [
+                        o for path in args.files for o in read_observations(path)
+                    ]
+                else:
+                    observations = [
+                        GrowthObservation(
+                            args.crop, args.seconds_per_percent, args.final_weight
+                        )
+                    ]
+                if unknown := unknown_crops(observations):
+                    parser.error(f"未知的作物: {'、'.join(unknown)}")
+                results = store.add_many(observations)
+                print_results(results)
+                crops = dict.fromkeys(o.crop for o in observations)
+                print_stats({crop: store.stats(crop) for crop in crops})
+            case "remove":
+                if not store.remove(args.id):
+                    parser.error(f"不存在的样本: {args.id}")
+            case "stats":
+                print_stats(store.all_stats())
+            case "rejected":
+                for id_, observation in store.rejected():
+                    print(f"{id_}\t{observation.crop}\t{observation.speed:.4f}")
+            case "rebuild":
+                store.rebuild_stats()
+                print_stats(store.all_stats())
+            case "export":
+                # 旧版样本库的剔除结果依赖记录顺序，导出前按整组样本重新筛选
+                store.rebuild_stats()
+                updated = export(store.all_stats(), args.min_samples)
+                print(f"已更新 {len(updated)} 种作物: {'、'.join(updated)}")
+
+
+if __name__ == "__main__":
+    main()
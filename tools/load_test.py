@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import orjson
+
+from fknc_calc import load_data
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_bodies(count: int, seed: int = 0) -> list[bytes]:
+    """随机生成单次计价请求"""
+    plants, mutations = load_data()
+    rng = random.Random(seed)
+    bodies = []
+    for _ in range(count):
+        plant = rng.choice(plants)
+        chosen = rng.sample(mutations, rng.randrange(0, 8))
+        weight = round(rng.uniform(plant.max_weight / 34, plant.max_weight), 3)
+        bodies.append(
+            orjson.dumps(
+                {
+                    "plant": plant.name,
+                    "weight": weight,
+                    "mutations": [m.name for m in chosen],
+                }
+            )
+        )
+    return bodies
+
+
+async def worker(
+    host: str,
+    port: int,
+    bodies: list[bytes],
+    latencies: list[float],
+):
+    """在一个保持的连接上依次发送请求"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            request = (
+                b"POST /price HTTP/1.1\r\n"
+                b"Host: " + host.encode() + b"\r\n"
+                b"Content-Type: application/json\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"\r\n" + body
+            )
+            start = time.perf_counter()
+            writer.write(request)
+            status = await reader.readline()
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                key, _, value = line.partition(b":")
+                if key.strip().lower() == b"content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b" 200 " not in status:
+                raise RuntimeError(f"请求失败: {status.decode().strip()}")
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run(host: str, port: int, connections: int, requests: int) -> None:
+    bodies = make_bodies(requests)
+    latencies: list[float] = []
+    per_connection = [bodies[i::connections] for i in range(connections)]
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(worker(host, port, chunk, latencies) for chunk in per_connection)
+    )
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{connections} 个连接，共 {len(latencies)} 次请求，用时 {elapsed:.2f} 秒")
+    print(f"吞吐: {len(latencies) / elapsed:,.0f} 请求/秒")
+    print(
+        f"延迟: p50 {statistics.median(latencies) * 1e3:.2f} ms, p99 {p99 * 1e3:.2f} ms"
+    )
+
+
+async def wait_until_ready(host: str, port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        await writer.wait_closed()
+        return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="计价服务压力测试")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--port", type=int, help="已运行的服务端口，不指定时自动启动一个服务"
+    )
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--max-delay", type=float, default=0)
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "fknc_calc.server",
+                "--host",
+                args.host,
+                "--port",
+                str(port),
+                "--max-delay",
+                str(args.max_delay),
+            ],
+        )
+    try:
+        asyncio.run(wait_until_ready(args.host, port))
+        asyncio.run(run(args.host, port, args.connections, args.requests))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import gc
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+SESSIONS = 10
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 共享方案：当前 ui.py，目录数据由 st.cache_resource 在进程内共享
+SHARED = """
+import ui
+
+ui.main()
+"""
+
+# 旧方案：每个会话在 session_state 中各自持有一份目录数据
+PER_SESSION = """
+import streamlit as st
+import ui
+from fknc_calc.catalog import Catalog
+
+
+def load_catalog():
+    if "loaded-data" not in st.session_state:
+        st.session_state["loaded-data"] = Catalog.load()
+    return st.session_state["loaded-data"]
+
+
+ui.load_catalog = load_catalog
+ui.main()
+"""
+
+
+PACKAGE = str(ROOT / "src" / "fknc_calc")
+
+
+def per_session_overhead(script: str) -> tuple[float, float]:
+    """
+    依次打开多个会话并保持存活，返回平均每个会话新增的内存：
+
+    (全部分配, 其中由 fknc_calc 分配的部分)
+    """
+    # 预热，排除模块导入与共享缓存的一次性开销
+    for _ in range(2):
+        AppTest.from_string(script, default_timeout=60).run()
+
+    gc.collect()
+    before = tracemalloc.take_snapshot()
+    sessions = []
+    for _ in range(SESSIONS):
+        at = AppTest.from_string(script, default_timeout=60)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        sessions.append(at)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+
+    diff = after.compare_to(before, "filename")
+    total = sum(stat.size_diff for stat in diff)
+    package = sum(
+        stat.size_diff
+        for stat in diff
+        if stat.traceback[0].filename.startswith(PACKAGE)
+    )
+    return total / SESSIONS, package / SESSIONS
+
+
+def measure(scheme: str) -> tuple[float, float]:
+    """每种方案在独立的子进程中测量，避免相互影响"""
+    output = subprocess.run(
+        [sys.executable, __file__, scheme],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    total, package = map(float, output.split())
+    return total, package
+
+
+def main():
+    if len(sys.argv) > 1:
+        sys.path.insert(0, str(ROOT))
+        tracemalloc.start()
+        script = {"shared": SHARED, "private": PER_SESSION}[sys.argv[1]]
+        print(*per_session_overhead(script))
+        return
+
+    from fknc_calc.catalog import Catalog
+
+    Catalog.load()
+    tracemalloc.start()
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    catalog = Catalog.load()
+    gc.collect()
+    catalog_size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del catalog
+
+    print(f"目录数据（一份）: {catalog_size / 1024:.1f} KiB")
+    print(f"每会话新增内存（{SESSIONS} 个会话平均，括号内为 fknc_calc 分配的部分）")
+    results = {}
+    for label, scheme in [("各自持有", "private"), ("进程共享", "shared")]:
+        results[scheme] = measure(scheme)
+        total, package = results[scheme]
+        print(f"{label}: {total / 1024:.1f} KiB ({package / 1024:.1f} KiB)")
+
+    saved = results["private"][1] - results["shared"][1]
+    print(f"每会话节省: {saved / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+import argparse
+import csv
+import importlib.util
+import math
+import sqlite3
+from collections import defaultdict
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+import orjson
+
+from fknc_calc.sync import sync_game_data
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB = ROOT / "observations.sqlite3"
+PACKAGE_DIR = ROOT / "src" / "fknc_calc"
+HISTORY_DIR = ROOT / "history"
+
+FIELDS = ("crop", "weight", "base", "special", "weather", "price")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY,
+    crop TEXT NOT NULL,
+    weight REAL NOT NULL,
+    base REAL NOT NULL DEFAULT 1,
+    special REAL NOT NULL DEFAULT 1,
+    weather REAL NOT NULL DEFAULT 0,
+    price INTEGER NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS observations_crop ON observations (crop);
+
+-- 各作物的充分统计量，随样本增删同步更新，拟合无需回读样本
+CREATE TABLE IF NOT EXISTS crop_stats (
+    crop TEXT PRIMARY KEY,
+    n INTEGER NOT NULL,
+    sum_ratio REAL NOT NULL,
+    sum_x_price REAL NOT NULL,
+    sum_x2 REAL NOT NULL,
+    sum_log_ratio REAL NOT NULL,
+    sum_log_ratio2 REAL NOT NULL
+);
+"""
+
+
+class Observation(NamedTuple):
+    crop: str
+    weight: float
+    price: int
+    base: float = 1.0
+    special: float = 1.0
+    weather: float = 0.0
+    """不含 +1，与 co-efficient.py 的 PriceCo 一致"""
+
+    @property
+    def x(self) -> float:
+        return self.special * self.base * self.weight**1.5 * (self.weather + 1.0)
+
+
+class Stats(NamedTuple):
+    """
+    一个作物的充分统计量，
+
+    ratio = price / X，最小二乘只需 Σx·price 与 Σx²，log 回归只需 Σlog(ratio)。
+    """
+
+    n: int = 0
+    sum_ratio: float = 0.0
+    sum_x_price: float = 0.0
+    sum_x2: float = 0.0
+    sum_log_ratio: float = 0.0
+    sum_log_ratio2: float = 0.0
+
+    @classmethod
+    def of(cls, observation: Observation) -> "Stats":
+        x = observation.x
+        if observation.price <= 0 or x <= 0:
+            raise ValueError(f"价格与重量须为正数: {observation}")
+        ratio = observation.price / x
+        log_ratio = math.log(ratio)
+        return cls(
+            1, ratio, x * observation.price, x * x, log_ratio, log_ratio * log_ratio
+        )
+
+    def __add__(self, other: "Stats") -> "Stats":
+        return Stats(*(a + b for a, b in zip(self, other)))
+
+    def __neg__(self) -> "Stats":
+        return Stats(*(-value for value in self))
+
+    @property
+    def mean(self) -> float:
+        return self.sum_ratio / self.n
+
+    @property
+    def least_squares(self) -> float:
+        """最小化 Σ(kX - price)^2"""
+        return self.sum_x_price / self.sum_x2
+
+    @property
+    def log_regression(self) -> float:
+        return math.exp(self.sum_log_ratio / self.n)
+
+    @property
+    def log_spread(self) -> float:
+        """log(price / X) 的标准差，即 log 模型的相对误差量级"""
+        if self.n < 2:
+            return 0.0
+        mean = self.sum_log_ratio / self.n
+        variance = (self.sum_log_ratio2 - self.n * mean * mean) / (self.n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+ESTIMATORS = {
+    "log": lambda stats: stats.log_regression,
+    "least-squares": lambda stats: stats.least_squares,
+    "mean": lambda stats: stats.mean,
+}
+
+
+class ObservationStore:
+    """SQLite 中的成交样本，以及随之增量维护的各作物统计量"""
+
+    def __init__(self, path: Path | str = DEFAULT_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> "ObservationStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _apply(self, deltas: dict[str, Stats]):
+        self.conn.executemany(
+            """
+            INSERT INTO crop_stats VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (crop) DO UPDATE SET
+                n = n + excluded.n,
+                sum_ratio = sum_ratio + excluded.sum_ratio,
+                sum_x_price = sum_x_price + excluded.sum_x_price,
+                sum_x2 = sum_x2 + excluded.sum_x2,
+                sum_log_ratio = sum_log_ratio + excluded.sum_log_ratio,
+                sum_log_ratio2 = sum_log_ratio2 + excluded.sum_log_ratio2
+            """,
+            [(crop, *delta) for crop, delta in deltas.items()],
+        )
+        self.conn.execute("DELETE FROM crop_stats WHERE n <= 0")
+
+    def add(self, observation: Observation) -> Stats:
+        """记录一个样本，O(1) 更新该作物的统计量并返回"""
+        return self.add_many([observation])[observation.crop]
+
+    def add_many(self, observations: Iterable[Observation]) -> dict[str, Stats]:
+        """批量记录样本，在同一事务中更新统计量，返回涉及作物的最新统计量"""
+        deltas: dict[str, Stats] = defaultdict(Stats)
+        rows = []
+        for observation in observations:
+            deltas[observation.crop] += Stats.of(observation)
+            rows.append(tuple(getattr(observation, field) for field in FIELDS))
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO observations ({', '.join(FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(FIELDS))})",
+                rows,
+            )
+            self._apply(deltas)
+        return {crop: self.stats(crop) for crop in deltas}
+
+    def remove(self, observation_id: int) -> bool:
+        """删除一个样本，并从统计量中减去"""
+        with self.conn:
+            row = self.conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM observations WHERE id = ?",
+                (observation_id,),
+            ).fetchone()
+            if row is None:
+                return False
+            observation = Observation(**dict(zip(FIELDS, row)))
+            self.conn.execute(
+                "DELETE FROM observations WHERE id = ?", (observation_id,)
+            )
+            self._apply({observation.crop: -Stats.of(observation)})
+        return True
+
+    def stats(self, crop: str) -> Stats:
+        row = self.conn.execute(
+            "SELECT n, sum_ratio, sum_x_price, sum_x2, sum_log_ratio, sum_log_ratio2 "
+            "FROM crop_stats WHERE crop = ?",
+            (crop,),
+        ).fetchone()
+        return Stats() if row is None else Stats(*row)
+
+    def all_stats(self) -> dict[str, Stats]:
+        rows = self.conn.execute(
+            "SELECT crop, n, sum_ratio, sum_x_price, sum_x2, sum_log_ratio, "
+            "sum_log_ratio2 FROM crop_stats ORDER BY crop"
+        )
+        return {crop: Stats(*values) for crop, *values in rows}
+
+    def rebuild_stats(self):
+        """从样本重新计算统计量，消除多次增删累积的浮点误差"""
+        deltas: dict[str, Stats] = defaultdict(Stats)
+        for row in self.conn.execute(f"SELECT {', '.join(FIELDS)} FROM observations"):
+            observation = Observation(**dict(zip(FIELDS, row)))
+            deltas[observation.crop] += Stats.of(observation)
+        with self.conn:
+            self.conn.execute("DELETE FROM crop_stats")
+            self._apply(deltas)
+
+    def observations(self) -> dict[str, list[Observation]]:
+        """全部样本，按作物分组"""
+        by_crop: dict[str, list[Observation]] = defaultdict(list)
+        for row in self.conn.execute(
+            f"SELECT {', '.join(FIELDS)} FROM observations ORDER BY crop, id"
+        ):
+            observation = Observation(**dict(zip(FIELDS, row)))
+            by_crop[observation.crop].append(observation)
+        return dict(by_crop)
+
+
+def read_observations(path: Path) -> list[Observation]:
+    """读取 CSV（带表头）或 JSONL，字段同 `Observation`"""
+    if path.suffix.lower() == ".csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            records = list(csv.DictReader(f))
+    else:
+        with open(path, "rb") as f:
+            records = [orjson.loads(line) for line in f if line.strip()]
+
+    observations = []
+    for record in records:
+        values = {
+            k: v for k, v in record.items() if k in FIELDS and v not in ("", None)
+        }
+        observations.append(
+            Observation(
+                crop=values.pop("crop"),
+                weight=float(values.pop("weight")),
+                price=int(values.pop("price")),
+                **{k: float(v) for k, v in values.items()},
+            )
+        )
+    return observations
+
+
+def coefficient_map_observations() -> list[Observation]:
+    """co-efficient.py 中手写的样本"""
+    spec = importlib.util.spec_from_file_location(
+        "co_efficient", Path(__file__).with_name("co-efficient.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return [
+        Observation(crop=crop, **sample.model_dump())
+        for crop, samples in module.coefficient_map.items()
+        for sample in samples
+    ]
+
+
+def load_plants() -> list[dict]:
+    return orjson.loads((PACKAGE_DIR / "plants.json").read_bytes())
+
+
+def unknown_crops(observations: list[Observation]) -> list[str]:
+    """plants.json 中没有的作物，其样本照常保存，但不会导出"""
+    known = {plant["name"] for plant in load_plants()}
+    return sorted({o.crop for o in observations if o.crop not in known})
+
+
+def print_stats(stats: dict[str, Stats]):
+    current = {plant["name"]: plant["priceCoefficient"] for plant in load_plants()}
+    print("作物\t样本\tlog 回归 k\t最小二乘 k\tlog 标准差%\t当前 k\t差异%")
+    for crop, s in stats.items():
+        k = s.log_regression
+        old = current.get(crop)
+        diff = f"{(k / old - 1) * 100:+.4f}" if old else "-"
+        print(
+            f"{crop}\t{s.n}\t{k:.4f}\t{s.least_squares:.4f}\t"
+            f"{s.log_spread * 100:.4f}\t{old}\t{diff}"
+        )
+
+
+def write_plants(plants: list[dict]):
+    """经由数据同步写回 plants.json，历史版本与发布的内容哈希随之更新"""
+    mutations = orjson.loads((PACKAGE_DIR / "mutations.json").read_bytes())
+    result = sync_game_data(
+        {"crops": plants, "mutations": mutations}, PACKAGE_DIR, HISTORY_DIR
+    )
+    print(f"数据版本: v{result.version.version} {result.version.content_hash[:12]}")
+
+
+def export(stats: dict[str, Stats], estimator: str, min_samples: int) -> list[str]:
+    """将拟合的系数写回 plants.json，返回更新的作物"""
+    plants = load_plants()
+    fit = ESTIMATORS[estimator]
+    updated = []
+    for plant in plants:
+        s = stats.get(plant["name"])
+        if s is None or s.n < min_samples:
+            continue
+        # 与 calc_price 一致，系数保留四位小数
+        k = round(fit(s), 4)
+        if k != plant["priceCoefficient"]:
+            plant["priceCoefficient"] = k
+            updated.append(plant["name"])
+    if updated:
+        write_plants(plants)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="成交样本库与增量系数拟合")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help="样本库路径")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="批量导入 CSV / JSONL 样本")
+    importer.add_argument("files", nargs="*", type=Path)
+    importer.add_argument(
+        "--coefficient-map",
+        action="store_true",
+        help="导入 co-efficient.py 中手写的样本",
+    )
+
+    adder = commands.add_parser("add", help="记录一个样本并输出更新后的系数")
+    adder.add_argument("crop")
+    adder.add_argument("weight", type=float)
+    adder.add_argument("price", type=int)
+    adder.add_argument("--base", type=float, default=1.0)
+    adder.add_argument("--special", type=float, default=1.0)
+    adder.add_argument(
+        "--weather", type=float, default=0.0, help="常规突变之和，不含 +1"
+    )
+
+    remover = commands.add_parser("remove", help="按编号删除样本")
+    remover.add_argument("id", type=int)
+
+    commands.add_parser("stats", help="各作物的拟合结果")
+    commands.add_parser("rebuild", help="从样本重新计算统计量")
+
+    exporter = commands.add_parser("export", help="将系数写回 plants.json")
+    exporter.add_argument("--estimator", choices=list(ESTIMATORS), default="log")
+    exporter.add_argument("--min-samples", type=int, default=2)
+
+    args = parser.parse_args()
+    with ObservationStore(args.db) as store:
+        match args.command:
+            case "import":
+                observations = [
+                    o for path in args.files for o in read_observations(path)
+                ]
+                if args.coefficient_map:
+                    observations += coefficient_map_observations()
+                if unknown := unknown_crops(observations):
+                    print(f"plants.json 中没有的作物: {'、'.join(unknown)}")
+                touched = store.add_many(observations)
+                print(f"已导入 {len(observations)} 个样本")
+                print_stats(touched)
+            case "add":
+                observation = Observation(
+                    args.crop,
+                    args.weight,
+                    args.price,
+                    args.base,
+                    args.special,
+                    args.weather,
+                )
+                if unknown_crops([observation]):
+                    parser.error(f"未知的作物: {args.crop}")
+                print_stats({args.crop: store.add(observation)})
+            case "remove":
+                if not store.remove(args.id):
+                    parser.error(f"不存在的样本: {args.id}")
+            case "stats":
+                print_stats(store.all_stats())
+            case "rebuild":
+                store.rebuild_stats()
+                print_stats(store.all_stats())
+            case "export":
+                updated = export(store.all_stats(), args.estimator, args.min_samples)
+                print(f"已更新 {len(updated)} 种作物: {'、'.join(updated)}")
+
+
+if __name__ == "__main__":
+    main()
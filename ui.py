@@ -1,18 +1,25 @@
+import math
 from functools import partial
 from collections import defaultdict
 from typing import Callable
 
 import streamlit as st
-from pypinyin import lazy_pinyin
+from streamlit.delta_generator import DeltaGenerator
 from fknc_calc import (
     BASE_MUTATIONS,
     Mutation,
     Plant,
-    load_data,
-    calc_price,
-    mutation_name_map,
+    read_data,
 )
-from fknc_calc.rules import RECIPES, is_mutation_disabled
+from fknc_calc.catalog import Catalog
+from fknc_calc.cache import PRICE_CACHE
+from fknc_calc.distribution import UniformWeight, price_distribution
+from fknc_calc.images import PLACEHOLDER, image_path
+from fknc_calc.optimizer import best_mutation_combos
+from fknc_calc.ranking import profit_table
+from fknc_calc.sprinklers import GIANT_FACTORS, SPRINKLERS, expected_values
+from fknc_calc.rules import RULES, is_mutation_disabled
+from fknc_calc.snapshot import content_hash
 from pydantic import ValidationError
 
 
@@ -26,8 +33,8 @@ def input_by_weight(selected_plant: Plant) -> float:
         step=0.001,
         format="%.3f",
     )
-
-    return weight
+    # 滑块的步进会累积浮点误差，与其他输入方式一样取到输入精度 0.001 kg
+    return round(weight, 3)
 
 
 def input_by_percent(selected_plant: Plant) -> float:
@@ -68,18 +75,18 @@ def input_by_speed(selected_plant: Plant) -> float:
 def show_calculation(
     base_mutation: Mutation | None,
     mutations: list[str],
-    mutations_map: dict[str, Mutation],
+    catalog: Catalog,
     crop: Plant,
     weight: float,
 ):
     # 构建突变列表
-    mutations_to_apply = [mutations_map[name] for name in mutations]
+    mutations_to_apply = list(mutations)
 
     if base_mutation is not None:
-        mutations_to_apply.append(base_mutation)
+        mutations_to_apply.append(base_mutation.name)
 
-    # 计算价格
-    price_result = calc_price(crop, weight, mutations_to_apply)
+    # 计算价格，相同的作物、重量与突变组合直接取缓存结果
+    price_result = PRICE_CACHE.price(catalog, crop, weight, mutations_to_apply)
     price = price_result.total_price
     if price < 1e4:
         price_pretty = None
@@ -158,17 +165,8 @@ def time_format(secs_per_percent: float) -> str:
     ).lstrip("0")
 
 
-def compute_all_special_mutations(plants: list[Plant]) -> set[str]:
-    return {
-        name
-        for plant in plants
-        if plant.special_mutations
-        for name in plant.special_mutations
-    }
-
-
 def display_name_of_mutation(
-    specials: set[str],
+    specials: frozenset[str],
     mutations_map: dict[str, Mutation],
     name: str,
 ):
@@ -250,7 +248,7 @@ def num_slider_input(
 
 
 def basic_info_panel(
-    plants: list[Plant],
+    catalog: Catalog,
     base_mutation_names: list[str],
     format_func: Callable[[str], str],
 ) -> tuple[str, Plant, float]:
@@ -259,27 +257,21 @@ def basic_info_panel(
         with st.container():
             col_1, col_2 = st.columns([2, 3])
 
-            plant_types = Plant.model_fields["quality"].annotation.__args__
+            plant_types = list(catalog.plant_names_by_quality)
             with col_1:
                 plant_quality = st.selectbox(
                     "选择品质", plant_types, label_visibility="collapsed"
                 )
 
             # 提供作物选择
-            plant_names = [
-                p.name
-                for p in sorted(
-                    (plant for plant in plants if plant.quality == plant_quality),
-                    key=lambda p: lazy_pinyin(p.name),
-                )
-            ]
+            plant_names = catalog.plant_names_by_quality[plant_quality]
             with col_2:
                 plant_name = st.selectbox(
                     "选择作物", plant_names, label_visibility="collapsed"
                 )
 
             # 获取选择的植物对象
-            plant = next(plant for plant in plants if plant.name == plant_name)
+            plant = catalog.plant(plant_name)
 
             col_1, col_2 = st.columns([2, 3])
 
@@ -305,8 +297,9 @@ def basic_info_panel(
                     label_visibility="collapsed",
                 )
 
-        url = f"https://www.fknc.top{plant.image_url}"
-        st.image(url, width=80, caption=plant_name)
+        # 使用数据提取工具预先缓存的缩略图，缺失时显示占位图
+        image = image_path(plant.image_url)
+        st.image(PLACEHOLDER if image is None else image, width=80, caption=plant_name)
 
     with col2, st.container(gap=None):
         st.write(f"重量: {plant.max_weight / 34:.2f}~{plant.max_weight:.2f} kg")
@@ -345,86 +338,249 @@ def basic_info_panel(
     return base_mutation_name, plant, weight
 
 
-def main():
-    # 加载植物和突变数据
-    if "loaded-data" in st.session_state:
-        plants, mutations, mutations_map = st.session_state["loaded-data"]
+def distribution_controls() -> DeltaGenerator:
+    """价格分布面板的输入部分，返回结果的占位元素"""
+    with st.expander("价格分布"):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.selectbox(
+                "重量分布",
+                ["UI 重量范围"] + list(SPRINKLERS),
+                format_func=lambda t: t if t == "UI 重量范围" else f"洒水器: {t}",
+                key="distribution-tier",
+            )
+        with col2:
+            st.toggle("巨大化", key="distribution-giant")
+        return st.empty()
+
+
+def show_distribution(slot: DeltaGenerator, plant: Plant, mutations: list[Mutation]):
+    tier = st.session_state["distribution-tier"]
+    giant = st.session_state["distribution-giant"]
+    if tier == "UI 重量范围":
+        distribution = UniformWeight()
     else:
-        plants, mutations = load_data()
-        mutations_map: dict[str, Mutation] = mutation_name_map(mutations)
-        st.session_state["loaded-data"] = (plants, mutations, mutations_map)
+        distribution = UniformWeight.sprinkler(
+            SPRINKLERS[tier], GIANT_FACTORS[1] if giant else GIANT_FACTORS[0]
+        )
+    result = price_distribution(plant, mutations, distribution)
+
+    with slot.container():
+        st.write(f"期望价格: {result.mean:,.0f}")
+        st.dataframe(
+            {
+                "分位点": [f"{level:.0%}" for level in result.quantile_levels],
+                "总价格": result.quantiles.round(),
+            },
+            hide_index=True,
+        )
+        st.bar_chart(
+            {
+                "价格区间下限": result.bin_edges[:-1].round(),
+                "概率": result.probabilities,
+            },
+            x="价格区间下限",
+            y="概率",
+        )
 
-    # 筛选特殊突变
-    ALL_SPECIAL_MUTATIONS = compute_all_special_mutations(plants)
 
-    display_name = partial(
-        display_name_of_mutation,
-        ALL_SPECIAL_MUTATIONS,
-        mutations_map,
+def optimizer_controls(
+    catalog: Catalog,
+    plant: Plant,
+    format_func: Callable[[str], str],
+) -> DeltaGenerator:
+    """最优突变组合面板的输入部分，返回结果的占位元素"""
+    with st.expander("最优突变组合"):
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            st.number_input(
+                "组合数量", min_value=1, max_value=50, value=5, key="optimizer-top-k"
+            )
+        with col2:
+            st.multiselect(
+                "无法获得的突变",
+                [
+                    name
+                    for name in catalog.mutations_by_name
+                    if name not in catalog.special_mutations
+                    or name in (plant.special_mutations or ())
+                ],
+                format_func=format_func,
+                key="optimizer-unavailable",
+            )
+        return st.empty()
+
+
+def show_optimizer(
+    slot: DeltaGenerator,
+    catalog: Catalog,
+    plant: Plant,
+    weight: float,
+):
+    top_k = st.session_state["optimizer-top-k"]
+    unavailable = st.session_state["optimizer-unavailable"]
+    available = set(catalog.mutations_by_name) - set(unavailable)
+    combos = best_mutation_combos(
+        catalog, plant, weight, top_k=int(top_k), available=available
+    )
+    slot.dataframe(
+        [
+            {
+                "总价格": round(combo.price.total_price),
+                "基础突变": combo.base_mutation or "无",
+                "独占突变": combo.special_mutation or "无",
+                "常规突变之和": combo.price.mutate_factor,
+                "常规突变": "、".join(combo.mutations),
+            }
+            for combo in combos
+        ],
+        hide_index=True,
     )
 
-    base_mutation_names = BASE_MUTATIONS[:]
 
-    # 显示植物详细信息
+def load_catalog() -> Catalog:
+    # 每次运行都检查数据文件的内容哈希，数据更新后重新构建目录，
+    # 计价缓存随目录的哈希变化而清空
+    data = read_data()
+    return _load_catalog(content_hash(*data), data)
 
-    st.markdown(
-        """
-    <span style='display: flex; justify-content: center;'>
-       <h4>作物信息</h4>
-    </span>
-""",
-        unsafe_allow_html=True,
-    )
 
-    selected_base_mutation_name, selected_plant, weight = basic_info_panel(
-        plants=plants,
-        base_mutation_names=base_mutation_names,
-        format_func=display_name,
+@st.cache_resource(max_entries=1)
+def _load_catalog(data_hash: bytes, _data: tuple[bytes, bytes]) -> Catalog:
+    # 加载植物和突变数据，数据只读，由所有会话共享同一份
+    return Catalog.from_data(*_data)
+
+
+def show_comparison(
+    slot: DeltaGenerator,
+    catalog: Catalog,
+    percent: float,
+    mutation_names: list[str],
+):
+    """以相同的重量百分比与突变，一次批量计算全部作物"""
+    table = profit_table(catalog, percent, mutation_names)
+    slot.dataframe(
+        {
+            "作物": [plant.name for plant in catalog.plants],
+            "品质": [plant.quality for plant in catalog.plants],
+            "重量": table.weight,
+            "售价": table.total_price,
+            "每千克售价": table.total_price / table.weight,
+            "生长时间": [
+                "未知" if math.isnan(t) else time_format(t / 100)
+                for t in table.growth_time
+            ],
+            "每秒售价": table.total_price / table.growth_time,
+        },
+        column_config={
+            "重量": st.column_config.NumberColumn(format="%.3f kg"),
+            "售价": st.column_config.NumberColumn(format="localized"),
+            "每千克售价": st.column_config.NumberColumn(format="localized"),
+            "每秒售价": st.column_config.NumberColumn(format="localized"),
+        },
+        hide_index=True,
     )
 
+
+def in_fragment_rerun() -> bool:
+    """是否为片段的局部重跑，整页运行时结果由 main 统一绘制"""
+    return not st.session_state.get("page-running", False)
+
+
+def show_results(catalog: Catalog, slots: dict[str, DeltaGenerator], parts: set[str]):
+    """
+    按会话中保存的当前选择，重绘 parts 指定的结果区域。
+
+    片段局部重跑时只重绘依赖于该片段输入的部分。
+    """
+    plant = catalog.plant(st.session_state["selected-plant"])
+    weight: float = st.session_state["selected-weight"]
+    base_mutation_name: str = st.session_state["selected-base-mutation"]
+    selected_mutations: set[str] = st.session_state.get("selected-mutations", set())
+
     # 获取选中的基础突变
-    if selected_base_mutation_name != "无":
-        selected_base_mutation = mutations_map[selected_base_mutation_name]
+    if base_mutation_name != "无":
+        base_mutation = catalog.mutation(base_mutation_name)
     else:
-        selected_base_mutation = None
-
-    # 选择其他突变
-    other_mutations = [
-        mutation
-        for mutation in mutations
-        if mutation.name not in BASE_MUTATIONS
-        and mutation.name not in ALL_SPECIAL_MUTATIONS
-    ]
-    other_mutation_names = [mutation.name for mutation in other_mutations]
-    # 特殊突变选择
-    special = (
-        list(selected_plant.special_mutations)
-        if selected_plant.special_mutations is not None
-        else []
-    )
+        base_mutation = None
+
+    if "price" in parts:
+        with slots["price"].container():
+            try:
+                show_calculation(
+                    base_mutation=base_mutation,
+                    mutations=selected_mutations,
+                    catalog=catalog,
+                    crop=plant,
+                    weight=weight,
+                )
 
-    selectable_names = other_mutation_names
+            except ValidationError as e:
+                st.error(f"输入数据无效: {e}")
+            except Exception as e:
+                st.error(f"发生错误: {e}")
+
+    if "distribution" in parts:
+        show_distribution(
+            slots["distribution"],
+            plant=plant,
+            mutations=[catalog.mutation(name) for name in selected_mutations]
+            + ([base_mutation] if base_mutation else []),
+        )
 
-    st.markdown(
-        """
-    <span style='display: flex; justify-content: center;'>
-       <h4>突变词条</h4>
-    </span>
-""",
-        unsafe_allow_html=True,
+    if "optimizer" in parts:
+        show_optimizer(slots["optimizer"], catalog, plant=plant, weight=weight)
+
+    if "comparison" in parts:
+        show_comparison(
+            slots["comparison"],
+            catalog,
+            percent=weight / plant.max_weight * 100,
+            mutation_names=list(selected_mutations)
+            + ([base_mutation_name] if base_mutation else []),
+        )
+
+
+def input_panel(
+    catalog: Catalog,
+    format_func: Callable[[str], str],
+    slots: dict[str, DeltaGenerator],
+):
+    """作物、基础突变与重量的输入"""
+    base_mutation_name, plant, weight = basic_info_panel(
+        catalog=catalog,
+        base_mutation_names=BASE_MUTATIONS[:],
+        format_func=format_func,
     )
 
-    # workaround for recipes condition
-    # note: RECIPES must stay the dependency order.
-    recipe_names = []
-    for recipe in RECIPES:
-        mutation = recipe["result"]
-        if mutation in selectable_names:
-            selectable_names.remove(mutation)
-            recipe_names.append(mutation)
+    plant_changed = st.session_state.get("selected-plant") != plant.name
+    st.session_state["selected-plant"] = plant.name
+    st.session_state["selected-base-mutation"] = base_mutation_name
+    st.session_state["selected-weight"] = weight
+
+    if in_fragment_rerun():
+        # 独占突变与各面板的选项随作物变化，需要整页重跑
+        if plant_changed:
+            st.rerun()
+        show_results(
+            catalog, slots, {"price", "distribution", "optimizer", "comparison"}
+        )
+
+
+def mutation_grid(
+    catalog: Catalog,
+    format_func: Callable[[str], str],
+    slots: dict[str, DeltaGenerator],
+):
+    """突变词条的勾选，切换词条时只重算规则与价格"""
+    plant = catalog.plant(st.session_state["selected-plant"])
+
+    # 特殊突变选择
+    special = list(plant.special_mutations) if plant.special_mutations else []
 
-    # 处理剩下的顺序
-    selectables = special + selectable_names
+    # 配方产物单独一列，按配方的拓扑序排列
+    recipe_names = list(catalog.recipe_mutations)
+    selectables = special + list(catalog.other_mutations)
 
     selected_mutations: set[str] = st.session_state.get("selected-mutations", set())
 
@@ -436,16 +592,14 @@ def main():
     for i, mutation_name in enumerate(selectables):
         col_items[1 + i % (cols_len - 1)].append(mutation_name)
 
+    # 产物总排在其原料之前，逐项累积禁用集合即可，无需每项重新判断
+    disabled_names: set[str] = set()
     for i, items in col_items.items():
         with cols[i]:
             for mutation_name in items:
-                disabled = is_mutation_disabled(
-                    selected_mutations,
-                    plant=selected_plant,
-                    new_mutation=mutation_name,
-                )
+                disabled = mutation_name in disabled_names
 
-                fmt_name = display_name(mutation_name)
+                fmt_name = format_func(mutation_name)
                 new_state = st.checkbox(
                     fmt_name,
                     disabled=disabled,
@@ -453,26 +607,206 @@ def main():
 
                 if new_state and not disabled:
                     selected_mutations.add(mutation_name)
+                    disabled_names |= RULES.excludes.get(mutation_name, frozenset())
                 else:
                     if mutation_name in selected_mutations:
                         selected_mutations.remove(mutation_name)
 
     st.session_state["selected-mutations"] = selected_mutations
 
+    if in_fragment_rerun():
+        # 最优组合与已选词条无关，无需重算
+        show_results(catalog, slots, {"price", "distribution", "comparison"})
+
+
+input_fragment = st.fragment(input_panel)
+mutation_grid_fragment = st.fragment(mutation_grid)
+
+
+def main():
+    catalog = load_catalog()
+
+    display_name = partial(
+        display_name_of_mutation,
+        catalog.special_mutations,
+        catalog.mutations_by_name,
+    )
+
+    # 页面分为输入、突变词条两个片段，各自局部重跑，
+    # 结果区域由片段写入下方的占位元素
+    st.session_state["page-running"] = True
     try:
-        show_calculation(
-            base_mutation=selected_base_mutation,
-            mutations=selected_mutations,
-            mutations_map=mutations_map,
-            crop=selected_plant,
-            weight=weight,
+        calculator_page(catalog, display_name)
+    finally:
+        # 页面出错或调用 st.stop() 时也要复位，否则之后的片段重跑会被误判为整页运行
+        st.session_state["page-running"] = False
+
+
+def calculator_page(catalog: Catalog, display_name: Callable[[str], str]):
+    slots: dict[str, DeltaGenerator] = {}
+
+    # 显示植物详细信息
+
+    st.markdown(
+        """
+    <span style='display: flex; justify-content: center;'>
+       <h4>作物信息</h4>
+    </span>
+""",
+        unsafe_allow_html=True,
+    )
+
+    input_fragment(catalog, display_name, slots)
+
+    st.markdown(
+        """
+    <span style='display: flex; justify-content: center;'>
+       <h4>突变词条</h4>
+    </span>
+""",
+        unsafe_allow_html=True,
+    )
+
+    mutation_grid_fragment(catalog, display_name, slots)
+
+    slots["price"] = st.empty()
+    slots["distribution"] = distribution_controls()
+    slots["optimizer"] = optimizer_controls(
+        catalog,
+        plant=catalog.plant(st.session_state["selected-plant"]),
+        format_func=display_name,
+    )
+    with st.expander("全部作物对比"):
+        slots["comparison"] = st.empty()
+    show_results(catalog, slots, {"price", "distribution", "optimizer", "comparison"})
+
+
+def mutation_set_input(catalog: Catalog) -> list[str]:
+    """统一的基础突变与突变词条选择，返回全部所选突变名称"""
+    display_name = partial(
+        display_name_of_mutation,
+        catalog.special_mutations,
+        catalog.mutations_by_name,
+    )
+
+    base_mutation_name = st.selectbox(
+        "基础突变",
+        ["无"] + BASE_MUTATIONS,
+        format_func=display_name,
+    )
+    mutation_names = st.multiselect(
+        "突变词条（独占突变仅对对应作物生效）",
+        list(catalog.recipe_mutations)
+        + list(catalog.other_mutations)
+        + sorted(catalog.special_mutations),
+        format_func=display_name,
+    )
+    conflicts = [
+        name
+        for name in mutation_names
+        if is_mutation_disabled(mutation_names, plant=None, new_mutation=name)
+    ]
+    if conflicts:
+        st.warning(f"以下突变无法同时携带: {'、'.join(conflicts)}")
+
+    if base_mutation_name != "无":
+        mutation_names = mutation_names + [base_mutation_name]
+    return mutation_names
+
+
+def ranking_page():
+    catalog = load_catalog()
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        mutation_names = mutation_set_input(catalog)
+    with col2:
+        percent = st.slider(
+            "重量百分比",
+            min_value=3.0,
+            max_value=100.0,
+            value=5.0,
+            step=0.1,
+            format="%.1f%%",
         )
 
-    except ValidationError as e:
-        st.error(f"输入数据无效: {e}")
-    except Exception as e:
-        st.error(f"发生错误: {e}")
+    table = profit_table(catalog, percent, mutation_names)
+
+    st.dataframe(
+        {
+            "作物": [plant.name for plant in catalog.plants],
+            "品质": [plant.quality for plant in catalog.plants],
+            "重量": table.weight,
+            "售价": table.total_price,
+            "种子价格": table.seed_price,
+            "生长时间": [
+                "未知" if math.isnan(t) else time_format(t / 100)
+                for t in table.growth_time
+            ],
+            "净利润": table.net_profit,
+            "每小时售价": table.price_per_hour,
+            "每小时净利润": table.profit_per_hour,
+        },
+        column_config={
+            "重量": st.column_config.NumberColumn(format="%.3f kg"),
+            "售价": st.column_config.NumberColumn(format="localized"),
+            "种子价格": st.column_config.NumberColumn(format="localized"),
+            "净利润": st.column_config.NumberColumn(format="localized"),
+            "每小时售价": st.column_config.NumberColumn(format="localized"),
+            "每小时净利润": st.column_config.NumberColumn(format="localized"),
+        },
+        hide_index=True,
+    )
+
+
+def sprinkler_page():
+    catalog = load_catalog()
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        mutation_names = mutation_set_input(catalog)
+    with col2:
+        tiers = list(SPRINKLERS)
+        current_tier = st.selectbox("当前洒水器", tiers[:-1])
+        target_tier = st.selectbox("升级为", tiers[tiers.index(current_tier) + 1 :])
+        giant = st.toggle("巨大化")
+
+    values = expected_values(
+        catalog,
+        mutation_names,
+        tiers=[current_tier, target_tier],
+        giants=[GIANT_FACTORS[1] if giant else GIANT_FACTORS[0]],
+    )[:, :, 0]
+    gain = values[:, 1] - values[:, 0]
+    # 按期望增益从高到低排列
+    order = gain.argsort()[::-1]
+    plants = [catalog.plants[i] for i in order]
+
+    st.dataframe(
+        {
+            "作物": [plant.name for plant in plants],
+            "品质": [plant.quality for plant in plants],
+            "当前期望价值": values[order, 0],
+            "升级后期望价值": values[order, 1],
+            "期望增益": gain[order],
+        },
+        column_config={
+            "当前期望价值": st.column_config.NumberColumn(format="localized"),
+            "升级后期望价值": st.column_config.NumberColumn(format="localized"),
+            "期望增益": st.column_config.NumberColumn(format="localized"),
+        },
+        hide_index=True,
+    )
+    st.caption("期望价值按 SPRINKERS.md 的闭式解计算，表格可按列排序。")
+
+
+PAGES: dict[str, Callable[[], None]] = {
+    "单株计算": main,
+    "收益排行": ranking_page,
+    "洒水器": sprinkler_page,
+}
 
 
 if __name__ == "__main__":
-    main()
+    page = st.sidebar.radio("模式", list(PAGES))
+    PAGES[page]()